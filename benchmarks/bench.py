@@ -0,0 +1,194 @@
+"""Benchmarki gorących ścieżek: kinematyka, trajektorie, rysowanie i import.
+
+Działa bez wyświetlacza (backend Agg). Wyniki zapisywane są jako JSON; tryb
+--compare porównuje je z zapisaną linią bazową i zgłasza regresje.
+
+    python benchmarks/bench.py --output bench.json
+    python benchmarks/bench.py --compare bench.json --threshold 0.2
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rrr import RobotRRR, RobotPlot  # noqa: E402
+
+SIZES = [10, 1000, 100000]
+TRAJECTORY_STEPS = [50, 500, 5000]
+
+
+def best_time(func, repeat=5, min_time=0.05):
+    # Najlepszy czas pojedynczego wywołania; krótkie funkcje uruchamiane są w pętli
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        if time.perf_counter() - start >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        timings.append((time.perf_counter() - start) / loops)
+    return min(timings)
+
+
+def record(results, name, seconds, items=1):
+    results[name] = {'seconds': seconds, 'items': items, 'per_item_s': seconds / items}
+
+
+def bench_kinematics(results, repeat):
+    robot = RobotRRR(1.0, 1.0, 1.0)
+    rng = np.random.default_rng(0)
+    for n in SIZES:
+        angles = rng.uniform(-180, 180, (n, 3))
+        _, targets = robot.forward_kinematics_batch(angles)
+        targets = targets.copy()
+
+        record(results, f'fk_batch[{n}]',
+               best_time(lambda: robot.forward_kinematics_batch(angles), repeat), n)
+        record(results, f'ik_batch[{n}]',
+               best_time(lambda: robot.inverse_kinematics_batch(targets), repeat), n)
+        record(results, f'ik_nearest_batch[{n}]',
+               best_time(lambda: robot.inverse_kinematics_nearest_batch(targets, [0, 0, 0]), repeat), n)
+
+        # Ścieżki skalarne są wolne, więc mierzone tylko dla mniejszych rozmiarów
+        if n <= 1000:
+            def fk_scalar():
+                for theta in angles:
+                    robot.forward_kinematics(*theta)
+
+            def ik_scalar():
+                for point in targets:
+                    robot.inverse_kinematics(*point)
+
+            record(results, f'fk_scalar[{n}]', best_time(fk_scalar, repeat), n)
+            record(results, f'ik_scalar[{n}]', best_time(ik_scalar, repeat), n)
+
+
+def bench_trajectory(results, repeat):
+    robot = RobotRRR(1.0, 1.0, 1.0)
+    for steps in TRAJECTORY_STEPS:
+        for profile in ('linear', 'quintic'):
+            record(results, f'trajectory_{profile}[{steps}]',
+                   best_time(lambda: robot.generate_trajectory([0, 0, 0], [90, 45, 30], steps,
+                                                               profile=profile), repeat), steps)
+
+
+def bench_render(results, repeat, frames=100):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    robot = RobotRRR(1.0, 1.0, 1.0)
+    trajectory = robot.generate_trajectory([0, 0, 0], [90, 45, 30], frames)
+
+    fig = Figure(figsize=(8, 8))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111, projection='3d')
+    plot = RobotPlot(ax)
+    plot.set_reach(robot.L1 + robot.L2 + robot.L3)
+    plot.set_title('Robot RRR')
+    plot.set_robot(trajectory[0])
+    fig.canvas.draw()
+
+    def blitted_frames():
+        for frame in range(1, frames):
+            plot.set_robot(trajectory[frame])
+            plot.set_trail(trajectory[:frame + 1, -1])
+            plot.refresh()
+
+    def full_draw():
+        fig.canvas.draw()
+
+    # Pierwsze pokazanie śladu zmienia legendę - rysowanie pełne przed pomiarem
+    plot.set_trail(trajectory[:2, -1])
+    fig.canvas.draw()
+    record(results, 'render_frame_blit', best_time(blitted_frames, repeat, min_time=0) / (frames - 1))
+    record(results, 'render_frame_full', best_time(full_draw, repeat, min_time=0))
+
+
+def bench_import(results, repeat):
+    from import_time import measure
+
+    for name, timing in measure(repeat).items():
+        if isinstance(timing, dict):
+            record(results, f'import_{name}', timing['median_s'])
+
+
+def run(repeat=5, include_import=True):
+    results = {}
+    bench_kinematics(results, repeat)
+    bench_trajectory(results, repeat)
+    bench_render(results, repeat)
+    if include_import:
+        bench_import(results, max(repeat, 5))
+
+    import matplotlib
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'matplotlib': matplotlib.__version__,
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold):
+    # Zwraca listę (nazwa, czas bazowy, czas bieżący, stosunek) oraz listę regresji
+    rows = []
+    regressions = []
+    for name, result in current['results'].items():
+        if name not in baseline['results']:
+            continue
+        base = baseline['results'][name]['seconds']
+        ratio = result['seconds'] / base if base > 0 else float('inf')
+        rows.append((name, base, result['seconds'], ratio))
+        if ratio > 1 + threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', help="plik JSON z wynikami")
+    parser.add_argument('--compare', metavar='BASELINE', help="plik JSON z linią bazową")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="dopuszczalny względny wzrost czasu (domyślnie 0.2 = 20%%)")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--no-import', action='store_true', help="pomiń pomiar czasu importu")
+    args = parser.parse_args(argv)
+
+    current = run(args.repeat, include_import=not args.no_import)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+
+    if args.compare is None:
+        if not args.output:
+            print(json.dumps(current, indent=2))
+        return 0
+
+    with open(args.compare) as f:
+        baseline = json.load(f)
+    rows, regressions = compare(current, baseline, args.threshold)
+    for name, base, now, ratio in rows:
+        flag = '  REGRESJA' if name in regressions else ''
+        print(f"{name:32s} {base * 1e3:12.4f} ms {now * 1e3:12.4f} ms {ratio:7.2f}x{flag}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
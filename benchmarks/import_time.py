@@ -0,0 +1,68 @@
+"""Pomiar czasu importu modułu rrr w świeżych procesach interpretera.
+
+Każdy wariant uruchamiany jest --repeat razy w nowym procesie (python -c ...),
+a wynik to mediana i minimum czasu ściennego. Dla porównania mierzony jest
+sam import NumPy oraz import rrr razem z załadowaniem GUI (load_gui()).
+
+    python benchmarks/import_time.py --repeat 20
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+VARIANTS = {
+    'numpy': 'import numpy',
+    'rrr': 'import rrr',
+    'rrr+gui': 'import rrr; rrr.load_gui()',
+}
+
+# Rdzeń kinematyki nie może ciągnąć za sobą modułów GUI
+CHECK_HEADLESS = (
+    "import sys, rrr; "
+    "gui = sorted(m for m in sys.modules if m.split('.')[0] in ('tkinter', 'matplotlib')); "
+    "print(','.join(gui))"
+)
+
+
+def time_statement(statement, repeat):
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    # Pierwsze uruchomienie rozgrzewa cache systemu plików i pliki .pyc
+    subprocess.run([sys.executable, '-c', statement], cwd=REPO_DIR, env=env, check=True)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', statement], cwd=REPO_DIR, env=env, check=True)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def measure(repeat=10):
+    results = {}
+    for name, statement in VARIANTS.items():
+        samples = time_statement(statement, repeat)
+        results[name] = {
+            'median_s': statistics.median(samples),
+            'min_s': min(samples),
+            'repeat': repeat,
+        }
+    leaked = subprocess.run([sys.executable, '-c', CHECK_HEADLESS], cwd=REPO_DIR,
+                            capture_output=True, text=True, check=True).stdout.strip()
+    results['gui_modules_loaded_by_core'] = leaked.split(',') if leaked else []
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args(argv)
+    print(json.dumps(measure(args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+"""Wsadowe obliczenia kinematyki robota RRR z wiersza poleceń (bez GUI).
+
+Wejście: plik CSV albo .npy z trzema kolumnami - kątami przegubów (fk) lub punktami
+docelowymi x, y, z (ik). Dane przetwarzane są fragmentami, a wyniki zapisywane na
+bieżąco do pliku CSV albo .npy. Z --workers fragmenty rozdzielane są na procesy;
+parsowanie i formatowanie CSV odbywa się w procesach roboczych.
+
+    python cli.py fk angles.csv positions.csv --lengths 1 1 1
+    python cli.py ik targets.npy angles.npy --elbow nearest --limits -90 90 0 180 -150 150
+    python cli.py ik targets.csv angles.csv --workers 8 --chunk-size 200000
+"""
+import argparse
+import io
+import itertools
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from rrr import ELBOW_DOWN, ELBOW_UP, RobotRRR, within_limits
+
+JOINT_NAMES = ['base', 'joint1', 'joint2', 'effector']
+
+
+def output_columns(command, options):
+    if command == 'fk':
+        if options['all_joints']:
+            return [f"{joint}_{axis}" for joint in JOINT_NAMES for axis in 'xyz']
+        return ['x', 'y', 'z']
+    if options['elbow'] == 'both':
+        return ['up_theta1', 'up_theta2', 'up_theta3', 'down_theta1', 'down_theta2', 'down_theta3',
+                'reachable', 'up_ok', 'down_ok']
+    return ['theta1', 'theta2', 'theta3', 'ok']
+
+
+def solve(command, robot, data, options):
+    # Obliczenia dla jednego fragmentu danych (n, 3); zwraca tablicę (n, liczba kolumn)
+    if command == 'fk':
+        positions, effector = robot.forward_kinematics_batch(data, degrees=not options['radians'])
+        if options['all_joints']:
+            return positions.reshape(len(data), 12)
+        return effector
+
+    limits = options['limits']
+    if options['elbow'] == 'nearest':
+        seed = [0.0, 0.0, 0.0] if options['seed'] is None else options['seed']
+        angles, found = robot.inverse_kinematics_nearest_batch(data, seed, limits)
+        return np.column_stack([angles, found])
+
+    solutions, reachable = robot.inverse_kinematics_batch(data)
+    ok = reachable[:, None] & (within_limits(solutions, limits) if limits is not None else True)
+    if options['elbow'] == 'both':
+        return np.column_stack([solutions.reshape(len(data), 6), reachable, ok])
+    branch = ELBOW_UP if options['elbow'] == 'up' else ELBOW_DOWN
+    return np.column_stack([solutions[:, branch], ok[:, branch]])
+
+
+def process_chunk(command, lengths, options, chunk, csv_output):
+    # Fragment CSV przychodzi jako tekst i jest parsowany tutaj, w procesie roboczym
+    if isinstance(chunk, str):
+        data = np.loadtxt(io.StringIO(chunk), delimiter=',', ndmin=2)
+    else:
+        data = np.asarray(chunk, dtype=float)
+    if data.size and data.shape[1] != 3:
+        raise ValueError(f"oczekiwano 3 kolumn, otrzymano {data.shape[1]}")
+    result = solve(command, RobotRRR(*lengths), data.reshape(-1, 3), options)
+    if not csv_output:
+        return result
+    buffer = io.StringIO()
+    np.savetxt(buffer, result, delimiter=',', fmt='%.10g')
+    return buffer.getvalue()
+
+
+def _data(line):
+    # Wiersz CSV bez komentarza; np.loadtxt pomija dokładnie te wiersze, dla których
+    # wynik jest pusty (wiersz z samymi spacjami jest dla niego wierszem danych)
+    return line.split('#', 1)[0].rstrip('\r\n')
+
+
+def _is_header(line):
+    # Pierwszy wiersz CSV traktowany jest jako nagłówek, gdy zawiera dane nieliczbowe
+    data = _data(line)
+    if not data.strip():
+        return False
+    try:
+        [float(value) for value in data.split(',')]
+    except ValueError:
+        return True
+    return False
+
+
+def read_chunks(path, chunk_size):
+    # .npy czytany przez mapowanie pamięci; CSV jako tekst po chunk_size wierszy
+    if path.endswith('.npy'):
+        data = np.load(path, mmap_mode='r')
+        for start in range(0, len(data), chunk_size):
+            yield np.array(data[start:start + chunk_size])
+        return
+    with open(path) as f:
+        first = f.readline()
+        # Fragmenty zawierają tylko wiersze danych (ten sam filtr co count_rows)
+        lines = itertools.chain([] if _is_header(first) else [first], f)
+        lines = (line for line in lines if _data(line))
+        while True:
+            chunk = ''.join(itertools.islice(lines, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+def count_rows(path):
+    if path.endswith('.npy'):
+        return len(np.load(path, mmap_mode='r'))
+    with open(path) as f:
+        first = f.readline()
+        rows = sum(1 for line in f if _data(line))
+    if _data(first) and not _is_header(first):
+        rows += 1
+    return rows
+
+
+class CsvOutput:
+    csv = True
+
+    def __init__(self, path, columns):
+        self.file = open(path, 'w')
+        self.file.write(','.join(columns) + '\n')
+
+    def write(self, text):
+        self.file.write(text)
+
+    def close(self):
+        self.file.close()
+
+
+class NpyOutput:
+    csv = False
+
+    def __init__(self, path, columns, rows):
+        self.array = np.lib.format.open_memmap(path, mode='w+', dtype=np.float64,
+                                               shape=(rows, len(columns)))
+        self.offset = 0
+
+    def write(self, result):
+        self.array[self.offset:self.offset + len(result)] = result
+        self.offset += len(result)
+
+    def close(self):
+        self.array.flush()
+        del self.array
+
+
+def run(command, input_path, output_path, lengths=(1.0, 1.0, 1.0), chunk_size=100000,
+        workers=1, **options):
+    options.setdefault('radians', False)
+    options.setdefault('all_joints', False)
+    options.setdefault('elbow', 'down')
+    options.setdefault('limits', None)
+    options.setdefault('seed', None)
+
+    columns = output_columns(command, options)
+    if output_path.endswith('.npy'):
+        output = NpyOutput(output_path, columns, count_rows(input_path))
+    else:
+        output = CsvOutput(output_path, columns)
+
+    chunks = read_chunks(input_path, chunk_size)
+    try:
+        if workers <= 1:
+            for chunk in chunks:
+                result = process_chunk(command, lengths, options, chunk, output.csv)
+                output.write(result)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # Wyniki zapisywane w kolejności wejścia; liczba fragmentów w locie jest
+                # ograniczona, aby odczyt nie wyprzedzał zapisu
+                pending = []
+                for chunk in itertools.chain(chunks, [None]):
+                    if chunk is not None:
+                        pending.append(pool.submit(process_chunk, command, lengths, options,
+                                                   chunk, output.csv))
+                    while pending and (chunk is None or len(pending) >= 2 * workers):
+                        output.write(pending.pop(0).result())
+    finally:
+        output.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Wsadowa kinematyka robota RRR")
+    parser.add_argument('command', choices=['fk', 'ik'])
+    parser.add_argument('input', help="plik wejściowy CSV albo .npy (3 kolumny)")
+    parser.add_argument('output', help="plik wyjściowy CSV albo .npy")
+    parser.add_argument('--lengths', type=float, nargs=3, default=[1.0, 1.0, 1.0],
+                        metavar=('L1', 'L2', 'L3'))
+    parser.add_argument('--radians', action='store_true', help="kąty wejściowe fk w radianach")
+    parser.add_argument('--all-joints', action='store_true',
+                        help="fk: pozycje wszystkich przegubów zamiast samego efektora")
+    parser.add_argument('--elbow', choices=['up', 'down', 'both', 'nearest'], default='down')
+    parser.add_argument('--limits', type=float, nargs=6,
+                        metavar=('T1MIN', 'T1MAX', 'T2MIN', 'T2MAX', 'T3MIN', 'T3MAX'))
+    parser.add_argument('--seed', type=float, nargs=3, metavar=('T1', 'T2', 'T3'),
+                        help="ik nearest: konfiguracja odniesienia")
+    parser.add_argument('--chunk-size', type=int, default=100000)
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    limits = None if args.limits is None else np.reshape(args.limits, (3, 2)).tolist()
+    try:
+        run(args.command, args.input, args.output, tuple(args.lengths), args.chunk_size,
+            args.workers, radians=args.radians, all_joints=args.all_joints, elbow=args.elbow,
+            limits=limits, seed=args.seed)
+    except (OSError, ValueError) as e:
+        print(f"Błąd: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
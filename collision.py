@@ -0,0 +1,237 @@
+"""Sprawdzanie kolizji ramienia robota RRR z przeszkodami i podłożem.
+
+Ogniwa modelowane są jako kapsuły (odcinki między kolejnymi przegubami z kinematyki
+prostej, poszerzone o link_radius). Przeszkody to kule, kapsuły i prostopadłościany
+równoległe do osi układu. Odległości odcinek-bryła liczone są wektorowo dla
+wszystkich kroków trajektorii naraz, a jednorodna siatka (tablica mieszająca
+komórek) ogranicza testy do przeszkód w pobliżu ogniw.
+
+Ujemny prześwit (clearance) oznacza kolizję. Dla kul i kapsuł jest to głębokość
+przenikania; dla prostopadłościanów prześwit ogniwa przechodzącego przez bryłę
+wynosi -link_radius. Ogniwo podstawy stoi na podłożu, więc jest pomijane
+w teście podłoża.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+CollisionReport = namedtuple('CollisionReport', ['first', 'clearance', 'colliding'])
+
+SPHERE, CAPSULE, BOX = 0, 1, 2
+
+# Kodowanie współrzędnych komórki siatki w jednym kluczu int64 (21 bitów na oś)
+_CELL_BITS = 21
+_CELL_OFFSET = 1 << (_CELL_BITS - 1)
+
+GOLDEN_ITERATIONS = 40
+
+
+def _cell_keys(cells):
+    cells = cells + _CELL_OFFSET
+    return (cells[:, 0] << (2 * _CELL_BITS)) | (cells[:, 1] << _CELL_BITS) | cells[:, 2]
+
+
+def _expand_cells(lo, hi):
+    # Wszystkie komórki prostopadłościanów [lo, hi] (indeksy całkowite, (n, 3));
+    # zwraca (właściciel, klucz komórki) dla każdej pary
+    dims = hi - lo + 1
+    counts = dims.prod(axis=1)
+    owner = np.repeat(np.arange(len(lo)), counts)
+    local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    dy, dz = dims[owner, 1], dims[owner, 2]
+    offset = np.stack([local // (dy * dz), (local // dz) % dy, local % dz], axis=1)
+    return owner, _cell_keys(lo[owner] + offset)
+
+
+def point_segment_distance(points, a, b):
+    # Odległości punktów (n, 3) od odcinków a-b (n, 3)
+    ab = b - a
+    length2 = np.einsum('ij,ij->i', ab, ab)
+    t = np.einsum('ij,ij->i', points - a, ab)
+    t = np.clip(np.divide(t, length2, out=np.zeros_like(t), where=length2 > 0), 0.0, 1.0)
+    return np.linalg.norm(a + t[:, None] * ab - points, axis=1)
+
+
+def segment_segment_distance(p1, q1, p2, q2):
+    # Odległości między odcinkami p1-q1 i p2-q2 (n, 3) - najbliższe punkty wg Ericsona,
+    # z obsługą odcinków zdegenerowanych do punktu
+    d1, d2, r = q1 - p1, q2 - p2, p1 - p2
+    a = np.einsum('ij,ij->i', d1, d1)
+    e = np.einsum('ij,ij->i', d2, d2)
+    f = np.einsum('ij,ij->i', d2, r)
+    c = np.einsum('ij,ij->i', d1, r)
+    b = np.einsum('ij,ij->i', d1, d2)
+    denom = a * e - b * b
+
+    def ratio(num, den):
+        return np.divide(num, den, out=np.zeros_like(num), where=den > 1e-12)
+
+    s = np.clip(ratio(b * f - c * e, denom), 0.0, 1.0)
+    t = ratio(b * s + f, e)
+    s = np.where(t < 0, np.clip(ratio(-c, a), 0.0, 1.0),
+                 np.where(t > 1, np.clip(ratio(b - c, a), 0.0, 1.0), s))
+    t = np.clip(t, 0.0, 1.0)
+    return np.linalg.norm(p1 + s[:, None] * d1 - p2 - t[:, None] * d2, axis=1)
+
+
+def segment_box_distance(a, b, lo, hi):
+    # Odległości odcinków a-b od prostopadłościanów [lo, hi] (n, 3). Odległość punktu
+    # odcinka od bryły wypukłej jest wypukłą funkcją parametru, więc minimum szukane
+    # jest metodą złotego podziału (błąd parametru < 1e-8 długości odcinka)
+    def distance(t):
+        points = a + t[:, None] * (b - a)
+        return np.linalg.norm(points - np.clip(points, lo, hi), axis=1)
+
+    ratio = (np.sqrt(5) - 1) / 2
+    left = np.zeros(len(a))
+    right = np.ones(len(a))
+    x1, x2 = right - ratio, left + ratio
+    f1, f2 = distance(x1), distance(x2)
+    for _ in range(GOLDEN_ITERATIONS):
+        # W każdej iteracji jedna nowa próbka na odcinek
+        lower = f1 < f2
+        right = np.where(lower, x2, right)
+        left = np.where(lower, left, x1)
+        probe = np.where(lower, right - ratio * (right - left), left + ratio * (right - left))
+        f_probe = distance(probe)
+        x1, x2 = np.where(lower, probe, x2), np.where(lower, x1, probe)
+        f1, f2 = np.where(lower, f_probe, f2), np.where(lower, f1, f_probe)
+    return np.minimum(np.minimum(f1, f2), np.minimum(distance(left), distance(right)))
+
+
+class Scene:
+    def __init__(self, link_radius=0.05, floor=True, cell_size=None):
+        # link_radius: promień kapsuł ogniw (liczba albo trzy wartości);
+        # floor: sprawdzanie podłoża z = 0; cell_size: bok komórki siatki
+        # (domyślnie dwukrotny medianowy rozmiar przeszkody)
+        self.link_radius = np.broadcast_to(np.asarray(link_radius, dtype=float), (3,)).copy()
+        self.floor = floor
+        self.cell_size = cell_size
+        self.kind = np.zeros(0, dtype=np.int8)
+        self.a = np.zeros((0, 3))
+        self.b = np.zeros((0, 3))
+        self.radius = np.zeros(0)
+        self.index = None
+
+    def __len__(self):
+        return len(self.kind)
+
+    def _add(self, kind, a, b, radius):
+        a = np.asarray(a, dtype=float).reshape(-1, 3)
+        b = np.asarray(b, dtype=float).reshape(-1, 3)
+        radius = np.broadcast_to(np.asarray(radius, dtype=float), (len(a),))
+        self.kind = np.concatenate([self.kind, np.full(len(a), kind, dtype=np.int8)])
+        self.a = np.concatenate([self.a, a])
+        self.b = np.concatenate([self.b, b])
+        self.radius = np.concatenate([self.radius, radius])
+        self.index = None
+
+    def add_sphere(self, center, radius):
+        # Jedna kula albo wiele naraz: center (n, 3), radius (n,)
+        center = np.asarray(center, dtype=float).reshape(-1, 3)
+        self._add(SPHERE, center, center, radius)
+
+    def add_capsule(self, start, end, radius):
+        self._add(CAPSULE, start, end, radius)
+
+    def add_box(self, lower, upper):
+        # Prostopadłościan równoległy do osi o narożnikach lower, upper
+        lower = np.asarray(lower, dtype=float).reshape(-1, 3)
+        upper = np.asarray(upper, dtype=float).reshape(-1, 3)
+        self._add(BOX, np.minimum(lower, upper), np.maximum(lower, upper), 0.0)
+
+    def bounds(self):
+        # Prostopadłościany otaczające przeszkody (n, 3), (n, 3)
+        radius = self.radius[:, None]
+        return np.minimum(self.a, self.b) - radius, np.maximum(self.a, self.b) + radius
+
+    def build_index(self):
+        lo, hi = self.bounds()
+        cell_size = self.cell_size
+        if cell_size is None:
+            cell_size = 2 * float(np.median((hi - lo).max(axis=1))) if len(self) else 1.0
+        cell_size = max(cell_size, 1e-3)
+        owner, keys = _expand_cells(np.floor(lo / cell_size).astype(np.int64),
+                                    np.floor(hi / cell_size).astype(np.int64))
+        order = np.argsort(keys, kind='stable')
+        self.index = (cell_size, keys[order], owner[order])
+        return self.index
+
+    def candidates(self, a, b, margin):
+        # Pary (odcinek, przeszkoda), dla których przeszkoda może leżeć bliżej niż
+        # margin + link_radius od odcinka a-b (n, 3). Długie odcinki dzielone są
+        # na fragmenty nie dłuższe niż komórka siatki.
+        cell_size, keys, owner = self.index or self.build_index()
+        pieces = int(np.ceil(np.linalg.norm(b - a, axis=1).max(initial=0.0) / cell_size)) or 1
+        fractions = np.linspace(0.0, 1.0, pieces + 1)[:, None, None]
+        ends = a + fractions * (b - a)
+        inflate = margin + self.link_radius.max()
+        lo = np.minimum(ends[:-1], ends[1:]).reshape(-1, 3) - inflate
+        hi = np.maximum(ends[:-1], ends[1:]).reshape(-1, 3) + inflate
+        query, cells = _expand_cells(np.floor(lo / cell_size).astype(np.int64),
+                                     np.floor(hi / cell_size).astype(np.int64))
+
+        left = np.searchsorted(keys, cells, side='left')
+        counts = np.searchsorted(keys, cells, side='right') - left
+        segment = np.repeat(query % len(a), counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        obstacle = owner[np.repeat(left, counts) + local]
+
+        pairs = np.unique(segment * len(self) + obstacle)
+        return pairs // len(self), pairs % len(self)
+
+    def distances(self, a, b, obstacle):
+        # Odległości odcinków a-b (n, 3) od powierzchni przeszkód obstacle (n,)
+        kind = self.kind[obstacle]
+        result = np.empty(len(obstacle))
+        
+        mask = kind == SPHERE
+        ids = obstacle[mask]
+        result[mask] = point_segment_distance(self.a[ids], a[mask], b[mask]) - self.radius[ids]
+        
+        mask = kind == CAPSULE
+        ids = obstacle[mask]
+        result[mask] = (segment_segment_distance(a[mask], b[mask], self.a[ids], self.b[ids])
+                        - self.radius[ids])
+        
+        mask = kind == BOX
+        ids = obstacle[mask]
+        result[mask] = segment_box_distance(a[mask], b[mask], self.a[ids], self.b[ids])
+        return result
+
+    def check(self, positions, margin=0.05, chunk_size=1024):
+        # positions: pozycje przegubów (T, 4, 3) albo (4, 3). Zwraca CollisionReport:
+        # first - indeks pierwszego kroku z kolizją albo None, clearance - najmniejszy
+        # prześwit ogniw w każdym kroku (T,), colliding - maska kolizji (T,).
+        # Przeszkody dalsze niż margin od ogniw są pomijane, więc prześwit jest dokładny
+        # do wartości margin; margin = np.inf sprawdza wszystkie pary bez siatki.
+        positions = np.asarray(positions, dtype=float).reshape(-1, 4, 3)
+        clearance = np.full(len(positions), np.inf)
+
+        for start in range(0, len(positions), chunk_size):
+            chunk = positions[start:start + chunk_size]
+            a = chunk[:, :-1].reshape(-1, 3)
+            b = chunk[:, 1:].reshape(-1, 3)
+            link = np.tile(np.arange(3), len(chunk))
+            links = np.full(len(a), np.inf)
+
+            if self.floor:
+                # Ogniwo podstawy (0) jest zamocowane w podłożu
+                lowest = np.minimum(a[:, 2], b[:, 2]) - self.link_radius[link]
+                links = np.where(link > 0, lowest, links)
+
+            if len(self):
+                if np.isinf(margin):
+                    segment = np.repeat(np.arange(len(a)), len(self))
+                    obstacle = np.tile(np.arange(len(self)), len(a))
+                else:
+                    segment, obstacle = self.candidates(a, b, margin)
+                if len(segment):
+                    d = self.distances(a[segment], b[segment], obstacle) - self.link_radius[link[segment]]
+                    np.minimum.at(links, segment, d)
+
+            clearance[start:start + len(chunk)] = links.reshape(-1, 3).min(axis=1)
+
+        colliding = clearance < 0
+        first = int(np.argmax(colliding)) if colliding.any() else None
+        return CollisionReport(first, clearance, colliding)
@@ -0,0 +1,2 @@
+# Moduły projektu leżą w katalogu głównym repozytorium; ten plik sprawia, że pytest
+# dodaje go do sys.path także przy uruchomieniu z innego katalogu.
@@ -0,0 +1,151 @@
+"""Indeks najbliższych konfiguracji robota RRR w przestrzeni przegubów.
+
+ConfigurationIndex próbkuje równomiernie kąty przegubów w granicach ograniczeń,
+liczy dla nich pozycje efektora i umieszcza je w jednorodnej siatce (tablicy
+mieszającej komórek, jak w collision). Zapytanie zwraca dla każdego punktu
+najbliższą próbkowaną pozycję efektora i jej kąty - przybliżenie najbliższej
+osiągalnej pozy, także gdy punkt leży poza zasięgiem lub ograniczeniami.
+Opcjonalne doprecyzowanie metodą tłumionych najmniejszych kwadratów
+z rzutowaniem na ograniczenia prowadzi do dokładnego rozwiązania (albo do
+lokalnie najbliższej osiągalnej pozy).
+
+Indeks budowany jest przy pierwszym zapytaniu i ponownie dopiero po zmianie
+długości ogniw robota, ograniczeń albo rozdzielczości.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from collision import _cell_keys
+
+NearestConfiguration = namedtuple('NearestConfiguration', ['angles', 'effector', 'distance'])
+
+DEFAULT_LIMITS = [[-180, 180], [-180, 180], [-180, 180]]
+
+
+class ConfigurationIndex:
+    def __init__(self, robot, resolution=48, cell_size=None):
+        # resolution: liczba próbek na przegub (liczba całkowita albo trzy wartości);
+        # cell_size: bok komórki siatki (domyślnie ok. 32 próbek na komórkę)
+        self.robot = robot
+        self.resolution = resolution
+        self.cell_size = cell_size
+        self.built_key = None
+        self.builds = 0
+
+    def key(self, limits):
+        limits = tuple(np.asarray(limits, dtype=float).ravel().tolist())
+        resolution = tuple(np.broadcast_to(self.resolution, (3,)).tolist())
+        return (self.robot.L1, self.robot.L2, self.robot.L3), limits, resolution
+
+    def ensure(self, limits=None):
+        # Przebudowa tylko po zmianie długości ogniw, ograniczeń lub rozdzielczości
+        if limits is None:
+            limits = DEFAULT_LIMITS
+        key = self.key(limits)
+        if key != self.built_key:
+            self.build(limits)
+            self.built_key = key
+
+    def build(self, limits, chunk_size=65536):
+        self.limits = np.asarray(limits, dtype=float).reshape(3, 2)
+        counts = np.broadcast_to(self.resolution, (3,))
+        axes = [np.linspace(lo, hi, n) for (lo, hi), n in zip(self.limits, counts)]
+        self.angles = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, 3)
+        self.effector = np.empty_like(self.angles)
+        for start in range(0, len(self.angles), chunk_size):
+            _, effector = self.robot.forward_kinematics_batch(self.angles[start:start + chunk_size])
+            self.effector[start:start + chunk_size] = effector
+
+        self.lower = self.effector.min(axis=0)
+        cell_size = self.cell_size
+        if cell_size is None:
+            volume = np.prod(np.maximum(self.effector.max(axis=0) - self.lower, 1e-6))
+            cell_size = (32 * volume / len(self.angles)) ** (1 / 3)
+        self.cell = max(cell_size, 1e-6)
+
+        # Próbki posortowane według komórek; dla każdej zajętej komórki jej narożnik
+        # oraz zakres próbek w self.order
+        cells = np.floor((self.effector - self.lower) / self.cell).astype(np.int64)
+        keys = _cell_keys(cells)
+        self.order = np.argsort(keys, kind='stable')
+        _, first, counts = np.unique(keys[self.order], return_index=True, return_counts=True)
+        self.cell_start = first
+        self.cell_count = counts
+        self.cell_lower = self.lower + cells[self.order[first]] * self.cell
+        self.builds += 1
+
+    def _samples(self, query, cell):
+        # Pary (punkt, próbka) dla wszystkich próbek w komórkach cell
+        counts = self.cell_count[cell]
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return np.repeat(query, counts), self.order[np.repeat(self.cell_start[cell], counts) + local]
+
+    def query(self, targets, limits=None, refine=False, chunk_size=256, **options):
+        # Najbliższe osiągalne pozycje efektora dla punktów targets (M, 3). Zwraca
+        # NearestConfiguration(kąty (M, 3), pozycje efektora (M, 3), odległości (M,)).
+        # refine=True doprecyzowuje wynik metodą refine (opcje przekazywane dalej).
+        self.ensure(limits)
+        targets = np.asarray(targets, dtype=float).reshape(-1, 3)
+        best = np.full(len(targets), np.inf)
+        found = np.zeros(len(targets), dtype=np.int64)
+
+        for start in range(0, len(targets), chunk_size):
+            chunk = targets[start:start + chunk_size]
+            rows = np.arange(start, start + len(chunk))
+
+            # Dolna granica odległości do każdej zajętej komórki; najbliższa komórka daje
+            # górną granicę wyniku, a dokładnie sprawdzane są tylko komórki, których
+            # dolna granica jej nie przekracza - wynik jest więc dokładny
+            below = self.cell_lower - chunk[:, None]
+            outside = np.maximum(below, 0.0) + np.maximum(-below - self.cell, 0.0)
+            bound = np.einsum('ijk,ijk->ij', outside, outside)
+            query, sample = self._samples(rows, np.argmin(bound, axis=1))
+            d = np.sum((self.effector[sample] - targets[query])**2, axis=1)
+            np.minimum.at(best, query, d)
+
+            query, cell = np.nonzero(bound <= best[rows, None])
+            query, sample = self._samples(rows[query], cell)
+            d = np.sum((self.effector[sample] - targets[query])**2, axis=1)
+            np.minimum.at(best, query, d)
+            closest = d == best[query]
+            found[query[closest]] = sample[closest]
+
+        angles = self.angles[found]
+        if refine:
+            return self.refine(targets, angles, **options)
+        return NearestConfiguration(angles, self.effector[found], np.sqrt(best))
+
+    def nearest(self, x, y, z, limits=None, refine=True):
+        # Pojedynczy punkt: (kąty, pozycja efektora, odległość)
+        angles, effector, distance = self.query([[x, y, z]], limits, refine)
+        return tuple(angles[0]), tuple(effector[0]), float(distance[0])
+
+    def refine(self, targets, angles, iterations=50, damping=0.01, tolerance=1e-10):
+        # Tłumione najmniejsze kwadraty z rzutowaniem kątów na ograniczenia indeksu.
+        # Krok zmniejszający błąd jest przyjmowany, a tłumienie maleje; w przeciwnym
+        # razie tłumienie rośnie dziesięciokrotnie (dla każdego punktu osobno).
+        targets = np.asarray(targets, dtype=float).reshape(-1, 3)
+        angles = np.array(angles, dtype=float).reshape(-1, 3)
+        lower, upper = self.limits[:, 0], self.limits[:, 1]
+        damping = np.full(len(angles), float(damping))
+        _, effector = self.robot.forward_kinematics_batch(angles)
+        error = np.linalg.norm(targets - effector, axis=1)
+        for _ in range(iterations):
+            active = error > tolerance
+            if not active.any():
+                break
+            step = self.robot.resolved_rate_velocities(
+                angles[active], targets[active] - effector[active], damping[active, None, None])
+            candidate = np.clip(angles[active] + step, lower, upper)
+            _, moved = self.robot.forward_kinematics_batch(candidate)
+            moved_error = np.linalg.norm(targets[active] - moved, axis=1)
+
+            better = moved_error < error[active]
+            rows = np.flatnonzero(active)[better]
+            angles[rows] = candidate[better]
+            effector[rows] = moved[better]
+            error[rows] = moved_error[better]
+            damping[active] = np.where(better, np.maximum(damping[active] / 2, 1e-6),
+                                       damping[active] * 10)
+        return NearestConfiguration(angles, effector, error)
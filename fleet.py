@@ -0,0 +1,236 @@
+"""Symulacja floty wielu ramion RRR w układzie struktury tablic.
+
+Fleet przechowuje długości ogniw, kąty przegubów, ograniczenia i stan ruchu K ramion
+w ciągłych tablicach (domyślnie float32, 81 bajtów na miejsce - bytes_per_arm; każde
+wolne miejsce zajmuje ponadto wpis w pythonowej liście-kopcu free, do ok. 36 bajtów).
+Kinematyka prosta, odwrotna i postęp trajektorii liczone są dla wszystkich ramion
+jednocześnie przez rozgłaszanie tablic, bez pętli po ramionach, tymi samymi wzorami
+co RobotRRR (rrr._forward_kinematics i rrr._inverse_kinematics). Usunięte ramiona zwalniają miejsca
+wykorzystywane ponownie przy dodawaniu (kopiec wolnych miejsc, najniższe indeksy
+najpierw), więc dodawanie
+i usuwanie nie kopiuje magazynu; tablice są powiększane dwukrotnie dopiero po
+zapełnieniu.
+
+FleetArm jest widokiem jednego ramienia: zachowuje się jak RobotRRR, ale długości
+ogniw i kąty czyta i zapisuje bezpośrednio w tablicach floty.
+"""
+import heapq
+
+import numpy as np
+
+from rrr import TIME_SCALING_PROFILES, RobotRRR, _forward_kinematics, _inverse_kinematics
+
+DEFAULT_LIMITS = [[-180, 180], [-180, 180], [-180, 180]]
+
+# Tablice stanu floty (pierwszy wymiar to miejsce ramienia) i kształty ich elementów
+FIELDS = {
+    'lengths': (3,),
+    'angles': (3,),
+    'limits': (3, 2),
+    'start': (3,),
+    'goal': (3,),
+    'elapsed': (),
+    'duration': (),
+}
+
+
+def _within(angles, limits):
+    # angles (n, ..., 3), limits (n, 3, 2) - ograniczenia osobne dla każdego ramienia
+    shape = (len(limits),) + (1,) * (angles.ndim - 2) + (3,)
+    lower = limits[..., 0].reshape(shape)
+    upper = limits[..., 1].reshape(shape)
+    return np.all((angles >= lower) & (angles <= upper), axis=-1)
+
+
+class Fleet:
+    def __init__(self, capacity=64, dtype=np.float32, profile='cubic'):
+        # profile: profil czasowy ruchów move_to (TIME_SCALING_PROFILES)
+        if profile not in TIME_SCALING_PROFILES:
+            raise ValueError(f"Nieznany profil trajektorii: {profile}")
+        self.dtype = np.dtype(dtype)
+        self.profile = profile
+        for name, shape in FIELDS.items():
+            setattr(self, name, np.zeros((capacity,) + shape, self.dtype))
+        self.limits[:] = DEFAULT_LIMITS
+        self.active = np.zeros(capacity, dtype=bool)
+        # Wolne miejsca jako kopiec (heapq) - najniższe indeksy wydawane są najpierw,
+        # także po usunięciu ramion w dowolnej kolejności
+        self.free = list(range(capacity))
+
+    def __len__(self):
+        return int(self.active.sum())
+
+    @property
+    def capacity(self):
+        return len(self.active)
+
+    @property
+    def slots(self):
+        # Indeksy miejsc zajętych przez ramiona
+        return np.flatnonzero(self.active)
+
+    @property
+    def bytes_per_arm(self):
+        return sum(getattr(self, name).itemsize * int(np.prod(shape, dtype=int))
+                   for name, shape in FIELDS.items()) + self.active.itemsize
+
+    def _grow(self, needed):
+        capacity = self.capacity
+        new_capacity = max(2 * capacity, capacity + needed)
+        for name in list(FIELDS) + ['active']:
+            old = getattr(self, name)
+            new = np.zeros((new_capacity,) + old.shape[1:], old.dtype)
+            new[:capacity] = old
+            setattr(self, name, new)
+        self.limits[capacity:] = DEFAULT_LIMITS
+        # Nowe indeksy są większe od wszystkich w kopcu, więc dopisanie go nie psuje
+        self.free.extend(range(capacity, new_capacity))
+
+    def add_many(self, lengths, angles=None, limits=None):
+        # lengths (K, 3), angles (K, 3), limits (3, 2) albo (K, 3, 2); zwraca miejsca (K,)
+        lengths = np.asarray(lengths, dtype=self.dtype).reshape(-1, 3)
+        if np.any(lengths <= 0):
+            raise ValueError("Długości ogniw muszą być dodatnie")
+        count = len(lengths)
+        if count > len(self.free):
+            self._grow(count - len(self.free))
+        slots = np.array([heapq.heappop(self.free) for _ in range(count)], dtype=np.int64)
+
+        self.lengths[slots] = lengths
+        self.angles[slots] = 0.0 if angles is None else angles
+        self.limits[slots] = DEFAULT_LIMITS if limits is None else limits
+        self.start[slots] = self.angles[slots]
+        self.goal[slots] = self.angles[slots]
+        self.elapsed[slots] = 0.0
+        self.duration[slots] = 0.0
+        self.active[slots] = True
+        return slots
+
+    def add(self, L1=1.0, L2=1.0, L3=1.0, angles=None, limits=None):
+        slot = self.add_many([[L1, L2, L3]], angles, limits)[0]
+        return FleetArm(self, int(slot))
+
+    def remove(self, slots):
+        # Zwolnienie miejsc (indeksy albo widoki FleetArm); dane pozostają w tablicach
+        # do ponownego użycia miejsca
+        if isinstance(slots, FleetArm):
+            slots = slots.slot
+        # Powtórzone indeksy zwalniane są raz - inaczej miejsce trafiłoby do kopca
+        # dwukrotnie i zostało wydane dwóm ramionom
+        slots = np.unique(np.asarray(slots, dtype=np.int64))
+        if not self.active[slots].all():
+            raise ValueError("Miejsce floty nie jest zajęte")
+        self.active[slots] = False
+        self.duration[slots] = 0.0
+        for slot in slots.tolist():
+            heapq.heappush(self.free, slot)
+
+    def arm(self, slot):
+        if not self.active[slot]:
+            raise ValueError(f"Miejsce floty {slot} nie jest zajęte")
+        return FleetArm(self, slot)
+
+    def _select(self, slots):
+        return self.slots if slots is None else np.asarray(slots, dtype=np.int64).reshape(-1)
+
+    def forward_kinematics(self, slots=None, angles=None):
+        # Pozycje przegubów (n, 4, 3) i efektorów (n, 3) ramion slots (domyślnie
+        # wszystkich) dla ich bieżących kątów albo kątów angles (n, 3) [°]
+        slots = self._select(slots)
+        L1, L2, L3 = self.lengths[slots].T
+        angles = self.angles[slots] if angles is None else np.asarray(angles, self.dtype)
+        positions = np.empty((len(slots), 4, 3), self.dtype)
+        _forward_kinematics(L1, L2, L3, angles.reshape(-1, 3), positions)
+        return positions, positions[:, 3]
+
+    def inverse_kinematics(self, targets, slots=None):
+        # Punkty docelowe (n, 3) dla ramion slots - jak RobotRRR.inverse_kinematics_batch
+        # z ograniczeniami: rozwiązania (n, 2, 3) [:, ELBOW_UP] i [:, ELBOW_DOWN] (NaN dla
+        # punktów nieosiągalnych), maska osiągalności (n,) i maska ograniczeń ramion (n, 2)
+        slots = self._select(slots)
+        L1, L2, L3 = self.lengths[slots].T
+        targets = np.broadcast_to(np.asarray(targets, self.dtype), (len(slots), 3))
+        solutions = np.empty((len(slots), 2, 3), self.dtype)
+        reachable = np.empty(len(slots), dtype=bool)
+        _inverse_kinematics(L1, L2, L3, targets, solutions, reachable)
+        return solutions, reachable, _within(solutions, self.limits[slots])
+
+    def move_to(self, goals, duration, slots=None):
+        # Rozpoczęcie ruchu przegubowego ramion slots do kątów goals (n, 3) [°]
+        # w czasie duration [s] (liczba albo (n,)); postęp liczy step
+        slots = self._select(slots)
+        duration = np.broadcast_to(np.asarray(duration, self.dtype), (len(slots),))
+        if np.any(duration <= 0):
+            raise ValueError("Czas ruchu musi być dodatni")
+        self.start[slots] = self.angles[slots]
+        self.goal[slots] = goals
+        self.elapsed[slots] = 0.0
+        self.duration[slots] = duration
+
+    def moving(self):
+        # Indeksy ramion w trakcie ruchu
+        return np.flatnonzero(self.active & (self.duration > 0))
+
+    def step(self, dt):
+        # Postęp wszystkich ruchów o dt [s]; kąty ustawiane wg profilu czasowego.
+        # Zwraca indeksy ramion, które w tym kroku zakończyły ruch.
+        slots = self.moving()
+        if len(slots) == 0:
+            return slots
+        elapsed = self.elapsed[slots] + dt
+        t = np.minimum(elapsed / self.duration[slots], 1.0)
+        s, _, _ = TIME_SCALING_PROFILES[self.profile](t)
+        start = self.start[slots]
+        self.angles[slots] = start + (self.goal[slots] - start) * s[:, None]
+        self.elapsed[slots] = elapsed
+
+        finished = slots[t >= 1.0]
+        self.angles[finished] = self.goal[finished]
+        self.duration[finished] = 0.0
+        return finished
+
+
+def _length_property(axis):
+    # Długość ogniwa czytana z tablicy floty; zmiana unieważnia cache IK widoku
+    def get_length(self):
+        return float(self.fleet.lengths[self.slot, axis])
+
+    def set_length(self, value):
+        if value != get_length(self):
+            self.fleet.lengths[self.slot, axis] = value
+            self.geometry_changed()
+
+    return property(get_length, set_length)
+
+
+class FleetArm(RobotRRR):
+    # Widok ramienia w miejscu slot floty. Metody RobotRRR działają bez zmian
+    # (obliczenia w float64 na długościach z floty); widok usuniętego ramienia
+    # nie powinien być używany.
+    def __init__(self, fleet, slot, ik_cache=None):
+        self.fleet = fleet
+        self.slot = slot
+        self.ik_cache = ik_cache
+        self._scratch = {}
+
+    L1 = _length_property(0)
+    L2 = _length_property(1)
+    L3 = _length_property(2)
+
+    @property
+    def angles(self):
+        # Widok (3,) kątów ramienia w tablicy floty
+        return self.fleet.angles[self.slot]
+
+    @angles.setter
+    def angles(self, value):
+        self.fleet.angles[self.slot] = value
+
+    @property
+    def limits(self):
+        return self.fleet.limits[self.slot]
+
+    @limits.setter
+    def limits(self, value):
+        self.fleet.limits[self.slot] = value
+
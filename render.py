@@ -0,0 +1,230 @@
+"""Renderowanie trajektorii robota RRR do klatek PNG lub pliku wideo (bez GUI).
+
+Źródłem jest tablica pozycji przegubów (N, 4, 3) z RobotRRR.generate_trajectory albo
+plik trajektorii zapisany przez trajfile. Klatki rysowane są backendem Agg w puli
+procesów; każdy proces tworzy raz własną figurę i RobotPlot, a dla kolejnych klatek
+zmienia tylko dane animowanych artystów (tło osi jest buforowane jak w GUI).
+Klatki zapisywane są jako ponumerowane pliki PNG albo przekazywane w kolejności
+do lokalnego kodera (ffmpeg).
+
+    python render.py trajectory.rrrt --output frames --stride 2 --workers 8
+    python render.py run1.rrrt run2.rrrt --output videos --video mp4 --fps 30
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from rrr import RobotPlot
+
+VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.avi', '.mov', '.webm', '.gif')
+
+# Polecenie kodera: surowe klatki RGBA na standardowym wejściu
+ENCODER_COMMAND = ['ffmpeg', '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgba',
+                   '-s', '{width}x{height}', '-r', '{fps}', '-i', '-', '-pix_fmt', 'yuv420p',
+                   '{output}']
+
+FRAME_NAME = 'frame_{:06d}.png'
+
+
+def link_lengths(positions):
+    # Długości ogniw odczytane z pozycji przegubów pierwszej klatki
+    return tuple(float(L) for L in np.linalg.norm(np.diff(positions[0], axis=0), axis=1))
+
+
+# Stan procesu: figura z RobotPlot (tworzona raz) i otwarte pliki trajektorii
+_worker = {}
+
+
+def _plot(figsize, dpi):
+    if _worker.get('figure_key') != (figsize, dpi):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        fig = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(fig)
+        _worker.update(figure_key=(figsize, dpi),
+                       plot=RobotPlot(fig.add_subplot(111, projection='3d')))
+    return _worker['plot']
+
+
+def _positions(source):
+    # source: ścieżka pliku trajektorii (mapowany raz na proces) albo tablica pozycji
+    if not isinstance(source, str):
+        return source
+    readers = _worker.setdefault('readers', {})
+    if source not in readers:
+        from trajfile import TrajectoryReader
+        readers[source] = TrajectoryReader(source)
+    return readers[source].positions
+
+
+def render_chunk(source, frames, numbers, options, directory=None):
+    # Rysuje klatki frames trajektorii; z directory zapisuje pliki PNG o numerach
+    # numbers, w przeciwnym razie zwraca (szerokość, wysokość, bajty RGBA klatek)
+    positions = _positions(source)
+    plot = _plot(options['figsize'], options['dpi'])
+    canvas = plot.canvas
+
+    plot.set_reach(sum(link_lengths(positions)))
+    plot.set_title(options['title'])
+    plot.set_robot(positions[frames[0]])
+    plot.set_trail(positions[:frames[0] + 1, -1] if options['trail'] else None)
+    if plot.background is None:
+        canvas.draw()
+
+    width, height = canvas.get_width_height(physical=True)
+    images = []
+    for frame, number in zip(frames, numbers):
+        plot.set_robot(positions[frame])
+        if options['trail']:
+            plot.set_trail(positions[:frame + 1, -1])
+        plot.refresh()
+        image = np.asarray(canvas.buffer_rgba())
+        if directory is not None:
+            from matplotlib.image import imsave
+            imsave(os.path.join(directory, FRAME_NAME.format(number)), image)
+        else:
+            images.append(image.tobytes())
+    return None if directory is not None else (width, height, b''.join(images))
+
+
+class _Job:
+    # Jedna trajektoria: podział klatek na zadania i miejsce docelowe wyników
+    def __init__(self, source, output, stride, chunk_size, fps, workers):
+        if isinstance(source, str):
+            from trajfile import TrajectoryReader
+            count = len(TrajectoryReader(source))
+        else:
+            source = np.asarray(source, dtype=float)
+            count = len(source)
+        self.source = source
+        self.output = output
+        self.fps = fps
+        self.video = output.lower().endswith(VIDEO_EXTENSIONS)
+        self.encoder = None
+        self.directory = None if self.video else output
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok=True)
+        self.workers = workers
+
+        frames = np.arange(0, count, stride)
+        self.tasks = [(frames[i:i + chunk_size], np.arange(i, min(i + chunk_size, len(frames))))
+                      for i in range(0, len(frames), chunk_size)]
+
+    def task_source(self, frames):
+        # Tablice przekazywane są procesom tylko w potrzebnym zakresie klatek
+        if isinstance(self.source, str) or self.workers <= 1:
+            return self.source, frames
+        return self.source[:frames[-1] + 1], frames
+
+    def write(self, result):
+        if result is None:
+            return
+        width, height, data = result
+        if self.encoder is None:
+            if shutil.which(ENCODER_COMMAND[0]) is None:
+                raise OSError(f"nie znaleziono kodera {ENCODER_COMMAND[0]}")
+            command = [arg.format(width=width, height=height, fps=self.fps, output=self.output)
+                       for arg in ENCODER_COMMAND]
+            self.encoder = subprocess.Popen(command, stdin=subprocess.PIPE)
+        self.encoder.stdin.write(data)
+
+    def close(self):
+        if self.encoder is not None:
+            self.encoder.stdin.close()
+            if self.encoder.wait() != 0:
+                raise OSError(f"koder zakończył się błędem przy zapisie {self.output}")
+            self.encoder = None
+
+
+def render_many(jobs, stride=1, workers=None, chunk_size=32, fps=20, figsize=(8, 8), dpi=100,
+                trail=True, title='Robot RRR'):
+    # jobs: lista par (źródło, wyjście); wyjście to katalog na klatki PNG albo plik
+    # wideo (rozszerzenie z VIDEO_EXTENSIONS). Wszystkie trajektorie dzielą jedną pulę.
+    workers = workers or os.cpu_count() or 1
+    options = {'figsize': tuple(figsize), 'dpi': dpi, 'trail': trail, 'title': title}
+    jobs = [_Job(source, output, stride, chunk_size, fps, workers) for source, output in jobs]
+    tasks = ((job, index) for job in jobs for index in range(len(job.tasks)))
+
+    def finish(job, index, result):
+        job.write(result)
+        if index == len(job.tasks) - 1:
+            job.close()
+
+    try:
+        if workers == 1:
+            for job, index in tasks:
+                frames, numbers = job.tasks[index]
+                source, frames = job.task_source(frames)
+                finish(job, index, render_chunk(source, frames, numbers, options, job.directory))
+            return
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Wyniki odbierane w kolejności zleceń (kolejność klatek wideo); liczba
+            # zadań w locie jest ograniczona, aby klatki nie gromadziły się w pamięci
+            pending = []
+            for job, index in tasks:
+                frames, numbers = job.tasks[index]
+                source, frames = job.task_source(frames)
+                pending.append((job, index, pool.submit(render_chunk, source, frames, numbers,
+                                                        options, job.directory)))
+                while len(pending) >= 2 * workers:
+                    job_, index_, future = pending.pop(0)
+                    finish(job_, index_, future.result())
+            for job, index, future in pending:
+                finish(job, index, future.result())
+    finally:
+        for job in jobs:
+            if job.encoder is not None:
+                job.encoder.kill()
+
+
+def render(source, output, stride=1, workers=None, chunk_size=32, fps=20, **options):
+    # source: tablica pozycji (N, 4, 3) z generate_trajectory albo ścieżka pliku trajektorii
+    render_many([(source, output)], stride, workers, chunk_size, fps, **options)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Renderowanie trajektorii robota RRR")
+    parser.add_argument('inputs', nargs='+', help="pliki trajektorii (*.rrrt)")
+    parser.add_argument('--output', default='frames',
+                        help="katalog wyjściowy (jedna trajektoria: katalog klatek)")
+    parser.add_argument('--video', metavar='EXT',
+                        help="zapis do pliku wideo przez ffmpeg, np. mp4")
+    parser.add_argument('--stride', type=int, default=1, help="renderuj co n-tą klatkę")
+    parser.add_argument('--fps', type=float, default=20)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=32)
+    parser.add_argument('--size', type=float, nargs=2, default=[8, 8], metavar=('W', 'H'),
+                        help="rozmiar figury w calach")
+    parser.add_argument('--dpi', type=int, default=100)
+    parser.add_argument('--no-trail', action='store_true')
+    args = parser.parse_args(argv)
+
+    jobs = []
+    for path in args.inputs:
+        name = os.path.splitext(os.path.basename(path))[0]
+        if args.video:
+            os.makedirs(args.output, exist_ok=True)
+            jobs.append((path, os.path.join(args.output, f"{name}.{args.video.lstrip('.')}")))
+        elif len(args.inputs) == 1:
+            jobs.append((path, args.output))
+        else:
+            jobs.append((path, os.path.join(args.output, name)))
+
+    try:
+        render_many(jobs, args.stride, args.workers, args.chunk_size, args.fps,
+                    tuple(args.size), args.dpi, not args.no_trail)
+    except (OSError, ValueError) as e:
+        print(f"Błąd: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
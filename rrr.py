@@ -1,97 +1,1158 @@
+import math
+import os
+import time
+from collections import OrderedDict, deque, namedtuple
+from contextlib import nullcontext
+
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-from mpl_toolkits.mplot3d import Axes3D
-import tkinter as tk
-from tkinter import ttk, messagebox
-from matplotlib.animation import FuncAnimation
+
+# Moduły GUI (tkinter, matplotlib) ładowane są leniwie przez load_gui(), dzięki czemu
+# rdzeń kinematyki można importować bez wyświetlacza i bez kosztu ładowania GUI
+tk = None
+ttk = None
+messagebox = None
+filedialog = None
+Figure = None
+FigureCanvasTkAgg = None
+
+
+def load_gui():
+    global tk, ttk, messagebox, filedialog, Figure, FigureCanvasTkAgg
+    import tkinter as tk
+    from tkinter import ttk, messagebox, filedialog
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+
+class Profiler:
+    # Opcjonalny pomiar czasu faz rysowania, IK i generowania trajektorii. Dla każdej
+    # fazy przechowywane jest window ostatnich pomiarów (p50/p95/max) i liczba wywołań.
+    # Wyłączony profiler zwraca współdzielony pusty kontekst, więc prawie nic nie kosztuje.
+    def __init__(self, enabled=False, window=500):
+        self.enabled = enabled
+        self.window = window
+        self.reset()
+    
+    def reset(self):
+        self.samples = {}
+        self.calls = {}
+        self.reset_frames()
+    
+    def reset_frames(self):
+        self.frame_times = deque(maxlen=self.window)
+        self.requested_fps = None
+    
+    def phase(self, name):
+        if not self.enabled:
+            return _NO_PHASE
+        return _ProfilerPhase(self, name)
+    
+    def add(self, name, seconds):
+        if name not in self.samples:
+            self.samples[name] = deque(maxlen=self.window)
+            self.calls[name] = 0
+        self.samples[name].append(seconds)
+        self.calls[name] += 1
+    
+    def frame(self, requested_fps):
+        # Znacznik czasu wyświetlonej klatki animacji
+        if self.enabled:
+            self.requested_fps = requested_fps
+            self.frame_times.append(time.perf_counter())
+    
+    def effective_fps(self):
+        if len(self.frame_times) < 2:
+            return None
+        return (len(self.frame_times) - 1) / (self.frame_times[-1] - self.frame_times[0])
+    
+    def stats(self):
+        phases = {}
+        for name, samples in self.samples.items():
+            p50, p95 = np.percentile(samples, [50, 95])
+            phases[name] = {
+                'calls': self.calls[name],
+                'p50_ms': p50 * 1e3,
+                'p95_ms': p95 * 1e3,
+                'max_ms': max(samples) * 1e3,
+            }
+        return {
+            'phases': phases,
+            'animation': {
+                'requested_fps': self.requested_fps,
+                'effective_fps': self.effective_fps(),
+            },
+        }
+    
+    def report(self):
+        stats = self.stats()
+        lines = [f"{'faza':32s} {'n':>6s} {'p50':>7s} {'p95':>7s} {'max':>7s} [ms]"]
+        for name, phase in sorted(stats['phases'].items()):
+            lines.append(f"{name:32s} {phase['calls']:6d} {phase['p50_ms']:7.2f} "
+                         f"{phase['p95_ms']:7.2f} {phase['max_ms']:7.2f}")
+        animation = stats['animation']
+        if animation['effective_fps'] is not None:
+            lines.append(f"FPS: {animation['effective_fps']:.1f} / {animation['requested_fps']:.1f}")
+        return "\n".join(lines)
+
+
+class _ProfilerPhase:
+    __slots__ = ('profiler', 'name', 'start')
+    
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+_NO_PHASE = nullcontext()
+
+# Globalny profiler; włączany przez PROFILER.enabled = True albo zmienną RRR_PROFILE=1
+PROFILER = Profiler(enabled=os.environ.get('RRR_PROFILE') == '1')
+
+
+# Indeksy gałęzi rozwiązania kinematyki odwrotnej w wynikach wsadowych
+ELBOW_UP = 0
+ELBOW_DOWN = 1
+
+# Przesunięcia o pełny obrót rozważane dla każdego przegubu niezależnie
+WRAP_OFFSETS = np.array([-360.0, 0.0, 360.0])
+
+
+def within_limits(angles, limits):
+    # angles: tablica (..., 3) kątów w stopniach
+    # limits: [[theta1_min, theta1_max], [theta2_min, theta2_max], [theta3_min, theta3_max]]
+    # NaN (np. punkty nieosiągalne) nigdy nie spełnia ograniczeń
+    limits = np.asarray(limits, dtype=float)
+    angles = np.asarray(angles, dtype=float)
+    return np.all((angles >= limits[:, 0]) & (angles <= limits[:, 1]), axis=-1)
+
+
+def wrapped_within_limits(angles, limits):
+    # Jak within_limits, ale każdy kąt może zostać przesunięty o ±360° - przeguby
+    # są niezależne, więc wystarczy sprawdzić przesunięcia osobno dla każdego z nich
+    limits = np.asarray(limits, dtype=float)
+    wrapped = np.asarray(angles, dtype=float)[..., None] + WRAP_OFFSETS
+    fits = (wrapped >= limits[:, 0, None]) & (wrapped <= limits[:, 1, None])
+    return np.all(fits.any(axis=-1), axis=-1)
+
+
+def nearest_wrap(angles, reference, limits=None):
+    # Każdy kąt angles (..., 3) przesunięty o 0 lub ±360° (WRAP_OFFSETS) tak, by był
+    # najbliższy reference (rozgłaszane do angles) i - gdy podano limits - mieścił się
+    # w ograniczeniach. Przeguby wybierane są niezależnie; NaN, gdy żadne przesunięcie
+    # nie spełnia ograniczeń (albo kąt jest NaN).
+    wrapped = np.asarray(angles, dtype=float)[..., None] + WRAP_OFFSETS
+    cost = (wrapped - np.asarray(reference, dtype=float)[..., None])**2
+    cost[np.isnan(cost)] = np.inf
+    if limits is not None:
+        limits = np.asarray(limits, dtype=float)
+        cost[(wrapped < limits[:, 0, None]) | (wrapped > limits[:, 1, None])] = np.inf
+    shift = np.argmin(cost, axis=-1)[..., None]
+    result = np.take_along_axis(wrapped, shift, axis=-1)[..., 0]
+    result[np.isinf(np.take_along_axis(cost, shift, axis=-1)[..., 0])] = np.nan
+    return result
+
+
+# Fragment ścieżki kartezjańskiej: numer fragmentu, indeks pierwszej próbki, punkty (n, 3),
+# kąty przegubów (n, 3), maska osiągalności (n,) i flaga ok (cały fragment osiągalny)
+PathChunk = namedtuple('PathChunk', ['index', 'start', 'points', 'angles', 'reachable', 'ok'])
+
+# Trajektoria w przestrzeni przegubów próbkowana w czasie: czasy (K,) [s], kąty [°],
+# prędkości [°/s] i przyspieszenia [°/s²] (K, 3)
+JointTrajectory = namedtuple('JointTrajectory', ['times', 'angles', 'velocities', 'accelerations'])
+
+# Domyślne ograniczenia prędkości [°/s] i przyspieszenia [°/s²] przegubów dla planera
+DEFAULT_MAX_VELOCITY = 90.0
+DEFAULT_MAX_ACCELERATION = 180.0
+
+
+def _allocate(name, shape, dtype=np.float64):
+    # Dostawca buforów roboczych bez ponownego użycia (jak RobotRRR._buffer)
+    return np.empty(shape, dtype)
+
+
+def _joint_terms(angles, degrees, out, buffer=_allocate):
+    # c1, s1, c2, s2, c23, s23 dla kątów (N, 3) zapisywane w out (6, N)
+    if degrees:
+        angles = np.radians(angles, out=buffer('radians', angles.shape, angles.dtype))
+    
+    c1, s1, c2, s2, c23, s23 = out
+    np.cos(angles[:, 0], out=c1)
+    np.sin(angles[:, 0], out=s1)
+    np.cos(angles[:, 1], out=c2)
+    np.sin(angles[:, 1], out=s2)
+    np.add(angles[:, 1], angles[:, 2], out=s23)
+    np.cos(s23, out=c23)
+    np.sin(s23, out=s23)
+    return c1, s1, c2, s2, c23, s23
+
+
+def _forward_kinematics(L1, L2, L3, angles, positions, degrees=True, buffer=_allocate):
+    # Wzory kinematyki prostej wspólne dla RobotRRR i fleet.Fleet. Długości ogniw to
+    # liczby (jedno ramię) albo tablice (N,) osobne dla każdej próbki; wynik zapisywany
+    # jest w positions (N, 4, 3), bufory robocze pochodzą z buffer(nazwa, kształt, typ)
+    n, dtype = len(angles), positions.dtype
+    c1, s1, c2, s2, c23, s23 = _joint_terms(angles, degrees, buffer('terms', (6, n), dtype), buffer)
+    
+    # positions[:, 0] - baza, [:, 1] - drugi przegub, [:, 2] - trzeci przegub, [:, 3] - efektor
+    positions[:, :2] = 0.0
+    positions[:, 1, 2] = L1
+    
+    # Pozycja trzeciego przegubu
+    a = np.multiply(L2, c2, out=buffer('a', (n,), dtype))
+    b = buffer('b', (n,), dtype)
+    np.multiply(a, c1, out=positions[:, 2, 0])
+    np.multiply(a, s1, out=positions[:, 2, 1])
+    np.add(L1, np.multiply(L2, s2, out=b), out=positions[:, 2, 2])
+    
+    # Pozycja efektora
+    np.multiply(L3, c23, out=a)
+    np.add(positions[:, 2, 0], np.multiply(a, c1, out=b), out=positions[:, 3, 0])
+    np.add(positions[:, 2, 1], np.multiply(a, s1, out=b), out=positions[:, 3, 1])
+    np.add(positions[:, 2, 2], np.multiply(L3, s23, out=b), out=positions[:, 3, 2])
+    return positions
+
+
+def _inverse_kinematics(L1, L2, L3, targets, solutions, reachable, buffer=_allocate):
+    # Wzory zamknięte kinematyki odwrotnej wspólne dla RobotRRR i fleet.Fleet: dla punktów
+    # targets (M, 3) zapisuje rozwiązania obu gałęzi łokcia w solutions (M, 2, 3) [°]
+    # (NaN dla punktów nieosiągalnych) i maskę osiągalności w reachable (M,). Długości
+    # ogniw jak w _forward_kinematics
+    m, dtype = len(targets), solutions.dtype
+    x = targets[:, 0]
+    y = targets[:, 1]
+    z = targets[:, 2]
+    # Długości osobne dla punktów rozgłaszane na obie gałęzie (M, 2)
+    L2b, L3b = (L2, L3) if np.ndim(L3) == 0 else (L2[:, None], L3[:, None])
+    
+    theta1 = np.arctan2(y, x, out=buffer('ik.theta1', (m,), dtype))
+    
+    r = buffer('ik.r', (m,), dtype)
+    z_rel = buffer('ik.z_rel', (m,), dtype)
+    d = buffer('ik.d', (m,), dtype)
+    tmp = buffer('ik.tmp', (m,), dtype)
+    np.sqrt(np.add(np.square(x, out=r), np.square(y, out=tmp), out=r), out=r)
+    np.subtract(z, L1, out=z_rel)
+    
+    np.sqrt(np.add(np.square(r, out=d), np.square(z_rel, out=tmp), out=d), out=d)
+    
+    unreachable = buffer('ik.unreachable', (m,), bool)
+    np.less_equal(d, L2 + L3, out=reachable)
+    np.logical_and(reachable, np.greater_equal(d, np.abs(L2 - L3), out=unreachable),
+                   out=reachable)
+    np.logical_not(reachable, out=unreachable)
+    
+    # Argument arccos liczony zawsze w float64: przy wyprostowanym lub złożonym łokciu
+    # (cos_theta3 blisko ±1) arccos jest źle uwarunkowany, a odstęp wartości float32
+    # przy ±1 dawałby w trybie float32 błąd theta3 rzędu 3e-4 rad
+    cos_theta3 = np.square(d, out=buffer('ik.cos_theta3', (m,)), dtype=np.float64)
+    cos_theta3 -= np.square(L2, dtype=np.float64)
+    cos_theta3 -= np.square(L3, dtype=np.float64)
+    cos_theta3 /= np.multiply(2 * L2, L3, dtype=np.float64)
+    
+    # Ograniczenie wartości do zakresu [-1, 1] dla arccos (ważne dla błędów numerycznych)
+    np.minimum(cos_theta3, 1.0, out=cos_theta3)
+    np.maximum(cos_theta3, -1.0, out=cos_theta3)
+    
+    # Elbow Up: theta3 ujemne, Elbow Down: theta3 dodatnie
+    theta3 = buffer('ik.theta3', (m, 2), dtype)
+    np.arccos(cos_theta3, out=theta3[:, ELBOW_DOWN])
+    np.negative(theta3[:, ELBOW_DOWN], out=theta3[:, ELBOW_UP])
+    
+    alpha = np.arctan2(z_rel, r, out=r)
+    beta = buffer('ik.beta', (m, 2), dtype)
+    denominator = buffer('ik.denominator', (m, 2), dtype)
+    np.multiply(L3b, np.sin(theta3, out=beta), out=beta)
+    np.add(L2b, np.multiply(L3b, np.cos(theta3, out=denominator), out=denominator),
+           out=denominator)
+    np.arctan2(beta, denominator, out=beta)
+    
+    # Osobno dla każdej gałęzi - rozgłaszanie kolumny (m, 1) w ufunc z out włącza
+    # buforowanie iteratora NumPy, które alokuje tymczasowe tablice
+    theta2 = beta
+    np.subtract(alpha, beta[:, ELBOW_UP], out=theta2[:, ELBOW_UP])
+    np.subtract(alpha, beta[:, ELBOW_DOWN], out=theta2[:, ELBOW_DOWN])
+    
+    # Konwersja na stopnie, punkty nieosiągalne oznaczone jako NaN
+    np.degrees(theta1, out=solutions[:, ELBOW_UP, 0])
+    solutions[:, ELBOW_DOWN, 0] = solutions[:, ELBOW_UP, 0]
+    np.degrees(theta2, out=solutions[:, :, 1])
+    np.degrees(theta3, out=solutions[:, :, 2])
+    np.copyto(solutions, np.nan, where=unreachable[:, None, None])
+    return solutions, reachable
+
+
+class IKCache:
+    # Pamięć podręczna wyników kinematyki odwrotnej z usuwaniem najdawniej używanych (LRU).
+    # Klucz: punkt docelowy skwantowany do tolerance, długości ogniw, konfiguracja
+    # łokcia i ograniczenia kątów. Punkty z tej samej komórki siatki dostają wynik
+    # obliczony dla pierwszego zapytania z tej komórki.
+    def __init__(self, maxsize=4096, tolerance=1e-6):
+        self.maxsize = maxsize
+        self.tolerance = tolerance
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def key(self, robot, x, y, z, elbow_up, limits=None):
+        target = (round(x / self.tolerance), round(y / self.tolerance), round(z / self.tolerance))
+        if limits is not None:
+            limits = tuple(np.asarray(limits, dtype=float).ravel().tolist())
+        return target, (robot.L1, robot.L2, robot.L3), elbow_up, limits
+    
+    def lookup(self, key):
+        # Zwraca (czy_znaleziono, wynik) - wynikiem może być też None (punkt nieosiągalny)
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return True, self.entries[key]
+        self.misses += 1
+        return False, None
+    
+    def store(self, key, result):
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+    
+    def clear(self):
+        if self.entries:
+            self.invalidations += 1
+        self.entries.clear()
+    
+    def stats(self):
+        return {
+            'size': len(self.entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
 
 
 class RobotRRR:    
-    def __init__(self, L1=1.0, L2=1.0, L3=1.0):
-        self.L1 = L1  
-        self.L2 = L2  
-        self.L3 = L3  
-        
-    def forward_kinematics(self, theta1, theta2, theta3):
-        th1 = np.radians(theta1)
-        th2 = np.radians(theta2)
-        th3 = np.radians(theta3)
-        
-        # Baza
-        x0, y0, z0 = 0, 0, 0
-        
-        # Pozycja drugiego przegubu
-        x1 = 0
-        y1 = 0
-        z1 = self.L1
-        
-        # Pozycja trzeciego przegubu
-        x2 = self.L2 * np.cos(th2) * np.cos(th1)
-        y2 = self.L2 * np.cos(th2) * np.sin(th1)
-        z2 = self.L1 + self.L2 * np.sin(th2)
-        
-        # Pozycja efektora
-        x3 = self.L2 * np.cos(th2) * np.cos(th1) + self.L3 * np.cos(th2 + th3) * np.cos(th1)
-        y3 = self.L2 * np.cos(th2) * np.sin(th1) + self.L3 * np.cos(th2 + th3) * np.sin(th1)
-        z3 = self.L1 + self.L2 * np.sin(th2) + self.L3 * np.sin(th2 + th3)
-        
-        positions = np.array([
-            [x0, y0, z0],
-            [x1, y1, z1],
-            [x2, y2, z2],
-            [x3, y3, z3]
-        ])
-        
-        return positions, (x3, y3, z3)
-    
-    def inverse_kinematics(self, x, y, z, elbow_up=False):
-        theta1 = np.arctan2(y, x)
-        
-        r = np.sqrt(x**2 + y**2)
+    def __init__(self, L1=1.0, L2=1.0, L3=1.0, ik_cache=None):
+        self.ik_cache = ik_cache
+        self._scratch = {}
+        self._L1 = L1  
+        self._L2 = L2  
+        self._L3 = L3  
+    
+    # Zmiana długości ogniw unieważnia zapamiętane wyniki kinematyki odwrotnej
+    @property
+    def L1(self):
+        return self._L1
+    
+    @L1.setter
+    def L1(self, value):
+        if value != self._L1:
+            self._L1 = value
+            self.geometry_changed()
+    
+    @property
+    def L2(self):
+        return self._L2
+    
+    @L2.setter
+    def L2(self, value):
+        if value != self._L2:
+            self._L2 = value
+            self.geometry_changed()
+    
+    @property
+    def L3(self):
+        return self._L3
+    
+    @L3.setter
+    def L3(self, value):
+        if value != self._L3:
+            self._L3 = value
+            self.geometry_changed()
+    
+    def geometry_changed(self):
+        if self.ik_cache is not None:
+            self.ik_cache.clear()
+        
+    def forward_kinematics(self, theta1, theta2, theta3, out=None):
+        # out: opcjonalny bufor (4, 3) na pozycje przegubów
+        positions, end_pos = self.forward_kinematics_batch(
+            [[theta1, theta2, theta3]], out=None if out is None else out.reshape(1, 4, 3))
+        return positions[0], tuple(end_pos[0])
+    
+    def _buffer(self, name, shape, dtype=np.float64):
+        # Bufor roboczy wielokrotnego użytku, alokowany ponownie tylko przy zmianie
+        # rozmiaru partii lub typu. Bufory są wspólne dla wywołań na tym obiekcie,
+        # więc jeden RobotRRR nie powinien być używany jednocześnie z wielu wątków.
+        buffer = self._scratch.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = self._scratch[name] = np.empty(shape, dtype)
+        return buffer
+    
+    def joint_terms(self, angles, degrees=True, out=None, dtype=np.float64):
+        # Wspólne wartości trygonometryczne kinematyki prostej i jakobianu,
+        # liczone raz dla całej partii kątów (N, 3); out - opcjonalny bufor (6, N)
+        angles = np.asarray(angles, dtype=dtype).reshape(-1, 3)
+        if out is None:
+            out = np.empty((6, len(angles)), angles.dtype)
+        return _joint_terms(angles, degrees, out, self._buffer)
+    
+    def forward_kinematics_batch(self, angles, degrees=True, out=None, dtype=None):
+        # angles: tablica (N, 3) kątów [theta1, theta2, theta3]
+        # out: opcjonalny bufor (N, 4, 3) na wynik - przy wielokrotnych wywołaniach
+        # z tym samym rozmiarem partii obliczenia nie alokują nowych tablic.
+        # dtype=np.float32: tryb kompaktowy o połowę mniejszej pamięci (dokładność w README)
+        if dtype is None:
+            dtype = np.float64 if out is None else out.dtype
+        angles = np.asarray(angles, dtype=dtype).reshape(-1, 3)
+        n = len(angles)
+        positions = np.empty((n, 4, 3), dtype) if out is None else out
+        if positions.shape != (n, 4, 3):
+            raise ValueError(f"Bufor out musi mieć kształt {(n, 4, 3)}, a nie {positions.shape}")
+        _forward_kinematics(self.L1, self.L2, self.L3, angles, positions, degrees, self._buffer)
+        return positions, positions[:, 3]
+    
+    def jacobian_batch(self, angles, degrees=True):
+        # Jakobian (N, 3, 3) pozycji efektora względem kątów przegubów w radianach:
+        # J[:, i, j] = d(x, y, z)[i] / d(theta)[j]. Z wyrażeń kinematyki prostej:
+        # x = c1 * A, y = s1 * A, z = L1 + B, gdzie A = L2*c2 + L3*c23, B = L2*s2 + L3*s23
+        c1, s1, c2, s2, c23, s23 = self.joint_terms(angles, degrees)
+        A = self.L2 * c2 + self.L3 * c23
+        B = self.L2 * s2 + self.L3 * s23
+        
+        J = np.zeros((len(c1), 3, 3))
+        J[:, 0, 0] = -s1 * A
+        J[:, 1, 0] = c1 * A
+        J[:, 0, 1] = -c1 * B
+        J[:, 1, 1] = -s1 * B
+        J[:, 2, 1] = A
+        J[:, 0, 2] = -c1 * self.L3 * s23
+        J[:, 1, 2] = -s1 * self.L3 * s23
+        J[:, 2, 2] = self.L3 * c23
+        return J
+    
+    def jacobian_determinant(self, angles, degrees=True):
+        # det J = -A * L2 * L3 * sin(theta3); zeruje się przy wyprostowanym lub złożonym
+        # łokciu (theta3 = 0°, 180°) oraz gdy efektor leży na osi pierwszego przegubu (A = 0)
+        angles = np.asarray(angles, dtype=float).reshape(-1, 3)
+        th3 = np.radians(angles[:, 2]) if degrees else angles[:, 2]
+        c1, s1, c2, s2, c23, s23 = self.joint_terms(angles, degrees)
+        A = self.L2 * c2 + self.L3 * c23
+        return -A * self.L2 * self.L3 * np.sin(th3)
+    
+    def jacobian_measures(self, angles, degrees=True):
+        # Wyznacznik, manipulowalność Yoshikawy sqrt(det(J J^T)) = |det J|
+        # i współczynnik uwarunkowania jakobianu (inf w osobliwości)
+        determinant = self.jacobian_determinant(angles, degrees)
+        singular_values = np.linalg.svd(self.jacobian_batch(angles, degrees), compute_uv=False)
+        with np.errstate(divide='ignore'):
+            condition = singular_values[:, 0] / singular_values[:, -1]
+        return determinant, np.abs(determinant), condition
+    
+    def jacobian_error(self, angles, eps=1e-6):
+        # Maksymalna różnica (N,) między jakobianem analitycznym a różnicami centralnymi
+        # kinematyki prostej - kontrola zgodności obu wyrażeń
+        angles = np.radians(np.asarray(angles, dtype=float).reshape(-1, 3))
+        numeric = np.empty((len(angles), 3, 3))
+        for j in range(3):
+            step = np.zeros(3)
+            step[j] = eps
+            _, forward = self.forward_kinematics_batch(angles + step, degrees=False)
+            _, backward = self.forward_kinematics_batch(angles - step, degrees=False)
+            numeric[:, :, j] = (forward - backward) / (2 * eps)
+        return np.abs(self.jacobian_batch(angles, degrees=False) - numeric).max(axis=(1, 2))
+    
+    def resolved_rate_velocities(self, angles, velocities, damping=0.01):
+        # Prędkości przegubów [°/s] dla zadanych prędkości efektora (N, 3) metodą
+        # tłumionych najmniejszych kwadratów: dq = J^T (J J^T + damping^2 I)^-1 v
+        J = self.jacobian_batch(angles)
+        Jt = J.transpose(0, 2, 1)
+        velocities = np.asarray(velocities, dtype=float).reshape(-1, 3, 1)
+        dq = Jt @ np.linalg.solve(J @ Jt + damping**2 * np.eye(3), velocities)
+        return np.degrees(dq[:, :, 0])
+    
+    def resolved_rate_trajectory(self, start_angles, targets, dt=0.02, gain=2.0, max_speed=0.5,
+                                 damping=0.01, tolerance=1e-4, max_steps=1000):
+        # Regulator prędkościowy: w każdym kroku prędkość efektora gain * błąd (ograniczona
+        # do max_speed) zamieniana jest na prędkości przegubów. Działa równolegle dla
+        # konfiguracji (N, 3) i celów (N, 3); zwraca kąty (kroki + 1, N, 3) do zbieżności
+        # wszystkich ramion albo max_steps.
+        angles = np.array(start_angles, dtype=float).reshape(-1, 3)
+        targets = np.broadcast_to(np.asarray(targets, dtype=float), angles.shape)
+        path = [angles.copy()]
+        for _ in range(max_steps):
+            _, effector = self.forward_kinematics_batch(angles)
+            error = targets - effector
+            distance = np.linalg.norm(error, axis=1)
+            if np.all(distance < tolerance):
+                break
+            velocity = gain * error
+            speed = gain * distance
+            velocity *= np.minimum(1.0, max_speed / np.maximum(speed, 1e-12))[:, None]
+            velocity[distance < tolerance] = 0.0
+            angles = angles + self.resolved_rate_velocities(angles, velocity, damping) * dt
+            path.append(angles)
+        return np.stack(path)
+    
+    def inverse_kinematics(self, x, y, z, elbow_up=False, limits=None):
+        # Zwraca None, gdy punkt jest nieosiągalny albo rozwiązanie narusza podane ograniczenia
+        if self.ik_cache is not None:
+            key = self.ik_cache.key(self, x, y, z, elbow_up, limits)
+            found, result = self.ik_cache.lookup(key)
+            if found:
+                return result
+        
+        result = None
+        angles = self._inverse_kinematics_point(x, y, z, elbow_up)
+        if angles is not None and (limits is None or within_limits(angles, limits)):
+            result = angles
+        
+        if self.ik_cache is not None:
+            self.ik_cache.store(key, result)
+        return result
+    
+    def _inverse_kinematics_point(self, x, y, z, elbow_up):
+        # Wzory zamknięte dla jednego punktu na liczbach Pythona (math) - kilkukrotnie
+        # szybsze od inverse_kinematics_batch dla jednej próbki; wyniki zgodne z nim
+        theta1 = math.atan2(y, x)
+        r = math.hypot(x, y)
         z_rel = z - self.L1
-        
-        d = np.sqrt(r**2 + z_rel**2)
-        
-        if d > (self.L2 + self.L3) or d < abs(self.L2 - self.L3):
+        d = math.hypot(r, z_rel)
+        if d > self.L2 + self.L3 or d < abs(self.L2 - self.L3):
             return None
         
+        # Ograniczenie wartości do zakresu [-1, 1] dla acos (ważne dla błędów numerycznych)
         cos_theta3 = (d**2 - self.L2**2 - self.L3**2) / (2 * self.L2 * self.L3)
-        
-        # Ograniczenie wartości do zakresu [-1, 1] dla arccos (ważne dla błędów numerycznych)
-        cos_theta3 = np.clip(cos_theta3, -1, 1)
+        cos_theta3 = min(max(cos_theta3, -1.0), 1.0)
         
         # Elbow Up: theta3 ujemne, Elbow Down: theta3 dodatnie
-        if elbow_up:
-            theta3 = -np.arccos(cos_theta3)
-        else:
-            theta3 = np.arccos(cos_theta3)
+        theta3 = -math.acos(cos_theta3) if elbow_up else math.acos(cos_theta3)
+        beta = math.atan2(self.L3 * math.sin(theta3), self.L2 + self.L3 * math.cos(theta3))
+        theta2 = math.atan2(z_rel, r) - beta
+        return (math.degrees(theta1), math.degrees(theta2), math.degrees(theta3))
+    
+    def inverse_kinematics_batch(self, targets, limits=None, out=None, dtype=None):
+        # targets: tablica (M, 3) punktów [x, y, z]
+        # Zwraca rozwiązania (M, 2, 3) w stopniach - [:, ELBOW_UP] i [:, ELBOW_DOWN],
+        # maskę osiągalności (M,) oraz opcjonalnie maskę ograniczeń kątów (M, 2).
+        # out: opcjonalna para buforów (rozwiązania (M, 2, 3), osiągalność (M,)) -
+        # bez ograniczeń kątów obliczenia nie alokują wtedy nowych tablic.
+        # dtype=np.float32: tryb kompaktowy (dokładność w README)
+        if dtype is None:
+            dtype = np.float64 if out is None else out[0].dtype
+        targets = np.asarray(targets, dtype=dtype).reshape(-1, 3)
+        m = len(targets)
+        if out is None:
+            out = np.empty((m, 2, 3), dtype), np.empty(m, dtype=bool)
+        solutions, reachable = out
+        if solutions.shape != (m, 2, 3) or reachable.shape != (m,):
+            raise ValueError(f"Bufory out muszą mieć kształty {(m, 2, 3)} i {(m,)}")
+        _inverse_kinematics(self.L1, self.L2, self.L3, targets, solutions, reachable, self._buffer)
+        
+        if limits is None:
+            return solutions, reachable
+        return solutions, reachable, within_limits(solutions, limits)
+    
+    def inverse_kinematics_families(self, targets):
+        # Wszystkie rodziny rozwiązań zamkniętych dla punktów (M, 3): dwie gałęzie łokcia
+        # [:, ELBOW_UP], [:, ELBOW_DOWN] oraz ich odbicia (theta1 + 180°, 180° - theta2,
+        # -theta3) [:, 2 + ELBOW_UP], [:, 2 + ELBOW_DOWN]. Kąty w [-180, 180), NaN dla
+        # punktów nieosiągalnych. Zwraca (M, 4, 3) i maskę osiągalności (M,).
+        solutions, reachable = self.inverse_kinematics_batch(targets)
+        
+        mirrored = np.empty_like(solutions)
+        mirrored[:, :, 0] = solutions[:, :, 0] + 180
+        mirrored[:, :, 1] = 180 - solutions[:, :, 1]
+        mirrored[:, :, 2] = -solutions[:, :, 2]
+        families = np.concatenate([solutions, mirrored], axis=1)
+        
+        # Sprowadzenie do [-180, 180) bez zmiany wartości już leżących w tym zakresie
+        families = np.where(families >= 180, families - 360, families)
+        families = np.where(families < -180, families + 360, families)
+        return families, reachable
+    
+    def inverse_kinematics_nearest_batch(self, targets, seed, limits=None, weights=None):
+        # Dla każdego punktu wybiera - spośród wszystkich rodzin rozwiązań i ich
+        # odpowiedników przesuniętych o ±360° - rozwiązanie spełniające ograniczenia,
+        # najbliższe konfiguracji seed (3,) lub (M, 3) w ważonej odległości kwadratowej.
+        # Zwraca kąty (M, 3) (NaN, gdy brak rozwiązania) i maskę znalezienia (M,).
+        families, _ = self.inverse_kinematics_families(targets)
+        seed = np.broadcast_to(np.asarray(seed, dtype=float), (len(families), 3))
+        weights = np.ones(3) if weights is None else np.asarray(weights, dtype=float)
+        
+        # Odległość jest sumą po przegubach, więc przesunięcie wybierane jest osobno dla
+        # każdego przegubu (nearest_wrap), a następnie najlepsza rodzina
+        wrapped = nearest_wrap(families, seed[:, None], limits)
+        family_cost = ((wrapped - seed[:, None])**2 * weights).sum(axis=-1)
+        family_cost[np.isnan(family_cost)] = np.inf
+        
+        best = np.argmin(family_cost, axis=1)
+        index = np.arange(len(families))
+        angles = wrapped[index, best]
+        found = np.isfinite(family_cost[index, best])
+        angles[~found] = np.nan
+        return angles, found
+    
+    def inverse_kinematics_nearest(self, x, y, z, seed, limits=None, weights=None):
+        angles, found = self.inverse_kinematics_nearest_batch([[x, y, z]], seed, limits, weights)
+        if not found[0]:
+            return None
+        theta1, theta2, theta3 = angles[0]
+        return (theta1, theta2, theta3)
+    
+    def interpolate_joints(self, start_angles, end_angles, steps=50, profile='linear', duration=1.0):
+        # Interpolacja w przestrzeni przegubów jako tablice (steps, 3):
+        # kąty [°], prędkości [°/s] i przyspieszenia [°/s²] dla ruchu trwającego duration sekund
+        if steps < 2:
+            raise ValueError("Trajektoria musi mieć co najmniej 2 kroki")
+        if profile not in TIME_SCALING_PROFILES:
+            raise ValueError(f"Nieznany profil trajektorii: {profile}")
+        
+        start_angles = np.asarray(start_angles, dtype=float)
+        delta = np.asarray(end_angles, dtype=float) - start_angles
+        
+        t = np.arange(steps) / (steps - 1)
+        s, ds, dds = TIME_SCALING_PROFILES[profile](t)
+        
+        angles = start_angles + s[:, None] * delta
+        velocities = (ds / duration)[:, None] * delta
+        accelerations = (dds / duration**2)[:, None] * delta
+        return angles, velocities, accelerations
+    
+    def generate_trajectory(self, start_angles, end_angles, steps=50, profile='linear',
+                            duration=1.0, return_derivatives=False, scene=None):
+        # Zwraca tablicę (steps, 4, 3) pozycji przegubów dla kolejnych kroków.
+        # Z podaną sceną (collision.Scene) trajektoria z kolizją jest odrzucana - zwracane
+        # jest None, tak jak dla nieosiągalnego punktu w inverse_kinematics.
+        with PROFILER.phase('generate_trajectory.interpolate'):
+            angles, velocities, accelerations = self.interpolate_joints(
+                start_angles, end_angles, steps, profile, duration
+            )
+        with PROFILER.phase('generate_trajectory.fk'):
+            positions, _ = self.forward_kinematics_batch(angles)
         
-        alpha = np.arctan2(z_rel, r)
-        beta = np.arctan2(self.L3 * np.sin(theta3), self.L2 + self.L3 * np.cos(theta3))
+        if scene is not None:
+            with PROFILER.phase('generate_trajectory.collision'):
+                if scene.check(positions).first is not None:
+                    return None
         
-        theta2 = alpha - beta
+        if return_derivatives:
+            return positions, angles, velocities, accelerations
+        return positions
+    
+    def plan_trajectory(self, waypoints, max_velocity=DEFAULT_MAX_VELOCITY,
+                        max_acceleration=DEFAULT_MAX_ACCELERATION, rate=50.0,
+                        return_derivatives=False, scene=None):
+        # Trajektoria przez punkty pośrednie waypoints (W, 3) [°] z ograniczeniami prędkości
+        # i przyspieszenia (plan_joint_trajectory), próbkowana z częstotliwością rate [Hz].
+        # Zwraca pozycje przegubów (K, 4, 3) - jak generate_trajectory, z liczbą kroków
+        # wynikającą z czasu ruchu
+        with PROFILER.phase('plan_trajectory.plan'):
+            _, angles, velocities, accelerations = plan_joint_trajectory(
+                waypoints, max_velocity, max_acceleration, rate
+            )
+        with PROFILER.phase('plan_trajectory.fk'):
+            positions, _ = self.forward_kinematics_batch(angles)
         
-        # Konwersja na stopnie
-        return (np.degrees(theta1), np.degrees(theta2), np.degrees(theta3))
+        if scene is not None:
+            with PROFILER.phase('plan_trajectory.collision'):
+                if scene.check(positions).first is not None:
+                    return None
+        
+        if return_derivatives:
+            return positions, angles, velocities, accelerations
+        return positions
     
-    def generate_trajectory(self, start_angles, end_angles, steps=50):
-        trajectory = []
-        for i in range(steps):
-            t = i / (steps - 1)
-            theta1 = start_angles[0] + t * (end_angles[0] - start_angles[0])
-            theta2 = start_angles[1] + t * (end_angles[1] - start_angles[1])
-            theta3 = start_angles[2] + t * (end_angles[2] - start_angles[2])
+    def cartesian_path(self, waypoints, step=0.01, chunk_size=1024, start_angles=None,
+                       elbow_up=False, limits=None, approach_steps=0):
+        # Generator ruchu prostoliniowego efektora przez punkty waypoints (W, 3).
+        # Ścieżka próbkowana jest co najwyżej co step, a rozwiązania IK zwracane są
+        # fragmentami PathChunk po chunk_size próbek, więc pamięć nie zależy od długości
+        # ścieżki. W obrębie ścieżki utrzymywana jest ta sama rodzina rozwiązań, a kąty
+        # są ciągłe (bez skoków o 360°) także między fragmentami. Konfiguracja początkowa
+        # jest przesuwana o ±360° do ograniczeń limits, jak w inverse_kinematics_nearest_batch.
+        waypoints = np.asarray(waypoints, dtype=float).reshape(-1, 3)
+        if len(waypoints) < 2:
+            raise ValueError("Ścieżka musi mieć co najmniej 2 punkty")
+        
+        segments = np.diff(waypoints, axis=0)
+        segment_lengths = np.linalg.norm(segments, axis=1)
+        cumulative = np.concatenate([[0.0], np.cumsum(segment_lengths)])
+        total = cumulative[-1]
+        samples = max(int(np.ceil(total / step)), 1) + 1
+        
+        seed = None if start_angles is None else np.asarray(start_angles, dtype=float)
+        previous = None
+        chunk_index = 0
+        
+        if seed is not None and approach_steps > 1:
+            # Dojazd w przestrzeni przegubów z pozycji startowej do początku ścieżki
+            first, found = self.inverse_kinematics_nearest_batch(waypoints[:1], seed, limits)
+            if found[0]:
+                _, angles, _, _ = self.generate_trajectory(seed, first[0], steps=approach_steps,
+                                                           return_derivatives=True)
+                _, points = self.forward_kinematics_batch(angles)
+                yield PathChunk(chunk_index, -approach_steps, points, angles,
+                                np.ones(approach_steps, dtype=bool), True)
+                chunk_index += 1
+                seed = first[0]
+        
+        for start in range(0, samples, chunk_size):
+            # Próbki ścieżki dla bieżącego fragmentu
+            s = total * np.arange(start, min(start + chunk_size, samples)) / (samples - 1)
+            segment = np.clip(np.searchsorted(cumulative, s, side='right') - 1, 0, len(segments) - 1)
+            length = segment_lengths[segment]
+            u = np.divide(s - cumulative[segment], length, out=np.zeros_like(s), where=length > 0)
+            points = waypoints[segment] + u[:, None] * segments[segment]
             
-            positions, _ = self.forward_kinematics(theta1, theta2, theta3)
-            trajectory.append(positions)
-        
-        return trajectory
+            families, reachable = self.inverse_kinematics_families(points)
+            
+            if previous is None:
+                # Wybór rodziny rozwiązań: najbliższej konfiguracji startowej albo
+                # zgodnej z elbow_up
+                valid = ~np.isnan(families[:, :, 0])
+                if limits is not None:
+                    valid &= wrapped_within_limits(families, limits)
+                first = np.argmax(valid.any(axis=1))
+                if not valid[first].any():
+                    family = None
+                elif seed is not None:
+                    candidates = nearest_wrap(families[first], seed, limits)
+                    distance = ((candidates - seed)**2).sum(axis=1)
+                    distance[~valid[first] | np.isnan(distance)] = np.inf
+                    family = int(np.argmin(distance))
+                    previous = candidates[family]
+                else:
+                    family = ELBOW_UP if elbow_up else ELBOW_DOWN
+                    if not valid[first, family]:
+                        family = int(np.argmax(valid[first]))
+                    previous = nearest_wrap(families[first, family], families[first, family], limits)
+            
+            if previous is None:
+                angles = np.full((len(points), 3), np.nan)
+            else:
+                # Rozwinięcie kątów osiągalnych próbek względem ostatniej konfiguracji
+                # (także poprzedniego fragmentu); próbki nieosiągalne pozostają NaN
+                angles = families[:, family]
+                rows = ~np.isnan(angles[:, 0])
+                angles[rows] = np.unwrap(np.vstack([previous, angles[rows]]), period=360, axis=0)[1:]
+            
+            if limits is not None:
+                reachable = reachable & within_limits(angles, limits)
+            ok = bool(reachable.all())
+            if ok:
+                previous = angles[-1]
+            elif reachable.any():
+                previous = angles[np.flatnonzero(reachable)[-1]]
+                seed = previous
+            
+            yield PathChunk(chunk_index, start, points, angles, reachable, ok)
+            chunk_index += 1
+
+
+# Profile skalowania czasu: dla t w [0, 1] zwracają s(t), s'(t), s''(t)
+def _linear_profile(t):
+    return t, np.ones_like(t), np.zeros_like(t)
+
+
+def _cubic_profile(t):
+    s = 3 * t**2 - 2 * t**3
+    ds = 6 * t - 6 * t**2
+    dds = 6 - 12 * t
+    return s, ds, dds
+
+
+def _quintic_profile(t):
+    s = 10 * t**3 - 15 * t**4 + 6 * t**5
+    ds = 30 * t**2 - 60 * t**3 + 30 * t**4
+    dds = 60 * t - 180 * t**2 + 120 * t**3
+    return s, ds, dds
+
+
+def _trapezoidal_profile(t, blend=0.25):
+    # Profil trapezowy prędkości: przyspieszanie przez ułamek blend czasu ruchu,
+    # stała prędkość, a następnie symetryczne hamowanie
+    v = 1 / (1 - blend)
+    a = v / blend
+    accel = t < blend
+    decel = t > 1 - blend
+    
+    s = v * (t - blend / 2)
+    s = np.where(accel, 0.5 * a * t**2, s)
+    s = np.where(decel, 1 - 0.5 * a * (1 - t)**2, s)
+    
+    ds = np.full_like(t, v)
+    ds = np.where(accel, a * t, ds)
+    ds = np.where(decel, a * (1 - t), ds)
+    
+    dds = np.zeros_like(t)
+    dds = np.where(accel, a, dds)
+    dds = np.where(decel, -a, dds)
+    return s, ds, dds
+
+
+TIME_SCALING_PROFILES = {
+    'linear': _linear_profile,
+    'cubic': _cubic_profile,
+    'quintic': _quintic_profile,
+    'trapezoidal': _trapezoidal_profile,
+}
+
+
+def _blend_durations(deltas, durations, max_acceleration):
+    # Prędkości odcinków (W-1, 3) uzupełnione o spoczynek na początku i końcu oraz czasy
+    # przejść parabolicznych (W,) w punktach pośrednich: najwolniejszy przegub przy
+    # dopuszczalnym przyspieszeniu wyznacza czas przejścia wspólny dla wszystkich przegubów
+    velocities = np.divide(deltas, durations[:, None], out=np.zeros_like(deltas),
+                           where=durations[:, None] > 0)
+    velocities = np.vstack([np.zeros(3), velocities, np.zeros(3)])
+    blends = (np.abs(np.diff(velocities, axis=0)) / max_acceleration).max(axis=1)
+    return velocities, blends
+
+
+def plan_joint_trajectory(waypoints, max_velocity=DEFAULT_MAX_VELOCITY,
+                          max_acceleration=DEFAULT_MAX_ACCELERATION, rate=50.0, iterations=20):
+    # Ruch przez punkty pośrednie waypoints (W, 3) [°]: odcinki o stałej prędkości
+    # połączone przejściami parabolicznymi (LSPB) wokół punktów pośrednich, więc ramię
+    # nie zatrzymuje się w nich (przechodzi w ich pobliżu). Ruch zaczyna się i kończy
+    # dokładnie w pierwszym i ostatnim punkcie, w spoczynku. Przeguby są
+    # zsynchronizowane (wspólne czasy odcinków), prędkości i przyspieszenia nie
+    # przekraczają max_velocity [°/s] i max_acceleration [°/s²] (liczba albo (3,)).
+    # Liczba próbek wynika z czasu ruchu i częstotliwości rate [Hz]. Zwraca JointTrajectory.
+    waypoints = np.asarray(waypoints, dtype=float).reshape(-1, 3)
+    max_velocity = np.broadcast_to(np.asarray(max_velocity, dtype=float), (3,))
+    max_acceleration = np.broadcast_to(np.asarray(max_acceleration, dtype=float), (3,))
+    if len(waypoints) < 1:
+        raise ValueError("Trajektoria musi mieć co najmniej 1 punkt")
+    if np.any(max_velocity <= 0) or np.any(max_acceleration <= 0) or rate <= 0:
+        raise ValueError("Ograniczenia prędkości, przyspieszenia i częstotliwość muszą być dodatnie")
+    
+    # Czasy odcinków: najpierw z ograniczenia prędkości, potem wydłużane tak, by
+    # przejścia sąsiednich punktów mieściły się w odcinku (b_i + b_i+1) / 2 <= T_i
+    deltas = np.diff(waypoints, axis=0)
+    distance = np.abs(deltas)
+    durations = np.maximum((distance / max_velocity).max(axis=1, initial=0.0),
+                           np.sqrt(distance / max_acceleration).max(axis=1, initial=0.0))
+    for _ in range(iterations):
+        _, blends = _blend_durations(deltas, durations, max_acceleration)
+        needed = (blends[:-1] + blends[1:]) / 2
+        if np.all(needed <= durations):
+            break
+        # Średnia geometryczna zbiega do czasu, przy którym przejścia mieszczą się dokładnie
+        grown = np.where(durations > 0, np.sqrt(durations * needed), needed)
+        durations = np.where(needed > durations, grown, durations)
+    
+    # Wspólne przeskalowanie czasu o s zmniejsza prędkości s razy, czasy przejść s razy,
+    # a więc stosunek potrzebnego czasu do czasu odcinka s² razy - gwarantuje zgodność
+    velocities, blends = _blend_durations(deltas, durations, max_acceleration)
+    needed = (blends[:-1] + blends[1:]) / 2
+    ratio = np.divide(needed, durations, out=np.zeros_like(needed), where=durations > 0)
+    scale = np.sqrt(max(ratio.max(initial=0.0), 1.0))
+    if scale > 1.0:
+        durations = durations * scale
+        velocities, blends = _blend_durations(deltas, durations, max_acceleration)
+    
+    # Chwile przejścia przez (okolice) punktów pośrednich; ruch zaczyna się w chwili 0
+    knots = blends[0] / 2 + np.concatenate([[0.0], np.cumsum(durations)])
+    duration = knots[-1] + blends[-1] / 2
+    steps = max(int(np.ceil(duration * rate - 1e-9)), 1) + 1
+    times = np.minimum(np.arange(steps) / rate, duration)
+    
+    # Ruch po odcinkach prostych: segment -1 przed startem, W-1 po zakończeniu
+    segment = np.searchsorted(knots, times, side='right') - 1
+    anchor = np.clip(segment, 0, len(waypoints) - 1)
+    angles = waypoints[anchor] + velocities[segment + 1] * (times - knots[anchor])[:, None]
+    speeds = velocities[segment + 1].copy()
+    accelerations = np.zeros_like(angles)
+    
+    # Próbki w przejściach parabolicznych wokół sąsiednich punktów pośrednich (przejścia
+    # nie nakładają się, więc próbka należy do co najwyżej jednego)
+    upper = np.clip(segment + 1, 0, len(waypoints) - 1)
+    in_upper = np.abs(times - knots[upper]) <= blends[upper] / 2
+    nearest = np.where(in_upper, upper, anchor)
+    offset = times - knots[nearest] + blends[nearest] / 2
+    inside = (offset >= 0) & (offset <= blends[nearest]) & (blends[nearest] > 0)
+    index = nearest[inside]
+    before = velocities[index]
+    acceleration = (velocities[index + 1] - before) / blends[index][:, None]
+    tau = offset[inside][:, None]
+    angles[inside] = (waypoints[index] + before * (tau - blends[index][:, None] / 2) +
+                      0.5 * acceleration * tau**2)
+    speeds[inside] = before + acceleration * tau
+    accelerations[inside] = acceleration
+    
+    # Ostatnia próbka dokładnie w punkcie końcowym
+    angles[-1] = waypoints[-1]
+    return JointTrajectory(times, angles, speeds, accelerations)
+
+
+class TrailBuffer:
+    # Prealokowany bufor pozycji efektora dla śladu trajektorii. Dopisanie punktu
+    # kosztuje O(1), a view() zwraca widok (bez kopiowania) na zapisane punkty.
+    # W trybie ring przechowywane jest tylko ostatnie capacity punktów - każdy punkt
+    # zapisywany jest dwukrotnie (i oraz i + capacity), dzięki czemu ostatnie punkty
+    # zawsze tworzą ciągły wycinek tablicy.
+    def __init__(self, capacity, ring=False):
+        self.capacity = max(int(capacity), 1)
+        self.ring = ring
+        self.buffer = np.empty((2 * self.capacity if ring else self.capacity, 3))
+        self.head = 0
+        self.size = 0
+    
+    def __len__(self):
+        return self.size
+    
+    def clear(self):
+        self.head = 0
+        self.size = 0
+    
+    def append(self, point):
+        if self.ring:
+            self.buffer[self.head] = point
+            self.buffer[self.head + self.capacity] = point
+            self.head = (self.head + 1) % self.capacity
+            self.size = min(self.size + 1, self.capacity)
+            return
+        if self.size == len(self.buffer):
+            self._grow(self.size + 1)
+        self.buffer[self.size] = point
+        self.size += 1
+    
+    def extend(self, points):
+        points = np.asarray(points).reshape(-1, 3)
+        if self.ring:
+            points = points[-self.capacity:]
+            index = (self.head + np.arange(len(points))) % self.capacity
+            self.buffer[index] = points
+            self.buffer[index + self.capacity] = points
+            self.head = (self.head + len(points)) % self.capacity
+            self.size = min(self.size + len(points), self.capacity)
+            return
+        if self.size + len(points) > len(self.buffer):
+            self._grow(self.size + len(points))
+        self.buffer[self.size:self.size + len(points)] = points
+        self.size += len(points)
+    
+    def _grow(self, needed):
+        # Bufor bez limitu rośnie geometrycznie, więc dopisywanie ma zamortyzowany koszt O(1)
+        buffer = np.empty((max(needed, 2 * len(self.buffer)), 3))
+        buffer[:self.size] = self.buffer[:self.size]
+        self.buffer = buffer
+    
+    def view(self):
+        if self.ring:
+            end = self.head + self.capacity
+            return self.buffer[end - self.size:end]
+        return self.buffer[:self.size]
+
+
+class AnimationClock:
+    # Odtwarzanie trajektorii według zegara: czas trajektorii to czas od startu
+    # pomnożony przez speed, a w każdym takcie wyświetlana jest próbka odpowiadająca
+    # temu czasowi (rate próbek na sekundę). Gdy rysowanie nie nadąża, próbki są
+    # pomijane zamiast opóźniać ruch; takty, które nie zostały wyświetlone na czas,
+    # liczone są jako utracone klatki (dropped).
+    def __init__(self, count, rate, speed=1.0, tick_rate=None, clock=time.perf_counter):
+        self.count = count
+        self.rate = rate
+        self.speed = speed
+        self.tick_rate = rate if tick_rate is None else tick_rate
+        self.clock = clock
+        self.offset = 0.0
+        self.anchor = None
+        self.last_frame = None
+        self.last_tick = None
+        self.shown = 0
+        self.dropped = 0
+    
+    @property
+    def paused(self):
+        return self.anchor is None
+    
+    @property
+    def duration(self):
+        return (self.count - 1) / self.rate
+    
+    @property
+    def finished(self):
+        return self.last_frame == self.count - 1
+    
+    def time(self):
+        # Bieżący czas trajektorii [s] w zakresie [0, duration]
+        t = self.offset
+        if self.anchor is not None:
+            t += (self.clock() - self.anchor) * self.speed
+        return min(max(t, 0.0), self.duration)
+    
+    def frame(self):
+        return min(int(self.time() * self.rate + 1e-9), self.count - 1)
+    
+    def start(self):
+        if self.anchor is None:
+            self.anchor = self.clock()
+    
+    def pause(self):
+        self.offset = self.time()
+        self.anchor = None
+        self.last_tick = None
+    
+    def set_speed(self, speed):
+        self.offset = self.time()
+        self.speed = speed
+        if self.anchor is not None:
+            self.anchor = self.clock()
+    
+    def seek(self, frame):
+        self.offset = min(max(frame, 0), self.count - 1) / self.rate
+        if self.anchor is not None:
+            self.anchor = self.clock()
+        self.last_tick = None
+    
+    def next_frame(self):
+        # Próbka do wyświetlenia w bieżącym takcie albo None, gdy się nie zmieniła
+        now = self.clock()
+        if self.last_tick is not None and not self.paused:
+            self.dropped += max(round((now - self.last_tick) * self.tick_rate) - 1, 0)
+        self.last_tick = now
+        frame = self.frame()
+        if frame == self.last_frame:
+            return None
+        self.last_frame = frame
+        self.shown += 1
+        return frame
+
+
+class RobotPlot:
+    # Warstwa rysowania: artyści tworzeni są raz, a w kolejnych klatkach zmieniane
+    # są tylko ich dane. Tło osi jest buforowane i odświeżane wyłącznie po pełnym
+    # przerysowaniu (zmiana długości ogniw, tytułu, legendy, obrót widoku).
+    def __init__(self, ax):
+        self.ax = ax
+        self.canvas = ax.figure.canvas
+        self.use_blit = self.canvas.supports_blit
+        self.background = None
+        self.max_reach = None
+        
+        self.robot_line, = ax.plot([], [], [], 'o-', linewidth=3, markersize=8,
+                                   color='blue', label='Robot')
+        self.trail_line, = ax.plot([], [], [], 'r--', linewidth=1, alpha=0.5,
+                                   label='Trajektoria')
+        self.base_marker, = ax.plot([0], [0], [0], 'rs', markersize=12, label='Podstawa')
+        self.effector_marker, = ax.plot([], [], [], 'g*', markersize=15, label='Efektor')
+        self.workspace_points, = ax.plot([], [], [], '.', markersize=2, color='gray',
+                                         alpha=0.3, label='Obszar roboczy')
+        self.trail_line.set_visible(False)
+        self.workspace_points.set_visible(False)
+        
+        # Nakładka ze statystykami profilera
+        self.overlay = ax.text2D(0.01, 0.99, "", transform=ax.transAxes, va='top',
+                                 family='monospace', fontsize=7, visible=False)
+        
+        # Artyści zmieniający się w każdej klatce
+        self.artists = [self.robot_line, self.trail_line, self.effector_marker, self.overlay]
+        for artist in self.artists:
+            artist.set_animated(self.use_blit)
+        
+        ax.set_xlabel('X')
+        ax.set_ylabel('Y')
+        ax.set_zlabel('Z')
+        ax.grid(True)
+        self.update_legend()
+        
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+    
+    def on_draw(self, event):
+        # Pełne przerysowanie pomija animowanych artystów - zapamiętaj tło i dorysuj ich
+        if self.use_blit:
+            self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+            self.draw_artists()
+    
+    def invalidate(self):
+        self.background = None
+    
+    def update_legend(self):
+        handles = [self.robot_line, self.trail_line, self.base_marker, self.effector_marker,
+                   self.workspace_points]
+        self.ax.legend(handles=[h for h in handles if h.get_visible()])
+        self.invalidate()
+    
+    def set_reach(self, max_reach):
+        if max_reach == self.max_reach:
+            return
+        self.max_reach = max_reach
+        self.ax.set_xlim([-max_reach, max_reach])
+        self.ax.set_ylim([-max_reach, max_reach])
+        self.ax.set_zlim([0, max_reach * 1.2])
+        self.invalidate()
+    
+    def set_title(self, title):
+        if title != self.ax.get_title():
+            self.ax.set_title(title)
+            self.invalidate()
+    
+    def set_robot(self, positions):
+        self.robot_line.set_data_3d(positions[:, 0], positions[:, 1], positions[:, 2])
+        self.effector_marker.set_data_3d(positions[-1:, 0], positions[-1:, 1], positions[-1:, 2])
+    
+    def set_trail(self, trail):
+        # trail: tablica (n, 3) pozycji efektora albo None, aby ukryć ślad
+        visible = trail is not None
+        if visible:
+            self.trail_line.set_data_3d(trail[:, 0], trail[:, 1], trail[:, 2])
+        if visible != self.trail_line.get_visible():
+            self.trail_line.set_visible(visible)
+            self.update_legend()
+    
+    def set_overlay(self, text):
+        # text: treść nakładki albo None, aby ją ukryć
+        self.overlay.set_visible(text is not None)
+        if text is not None:
+            self.overlay.set_text(text)
+    
+    def set_workspace(self, points):
+        # points: tablica (n, 3) punktów brzegu obszaru roboczego albo None;
+        # obszar roboczy jest statyczny, więc należy do buforowanego tła
+        visible = points is not None
+        if visible:
+            self.workspace_points.set_data_3d(points[:, 0], points[:, 1], points[:, 2])
+        self.workspace_points.set_visible(visible)
+        self.update_legend()
+    
+    def draw_artists(self):
+        for artist in self.artists:
+            self.ax.draw_artist(artist)
+    
+    @property
+    def blitting(self):
+        # True, gdy refresh rysuje od razu animowane artysty na buforowanym tle;
+        # w przeciwnym razie refresh tylko zleca pełne przerysowanie (draw_idle)
+        return self.use_blit and self.background is not None
+    
+    def refresh(self):
+        if not self.blitting:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.background)
+        self.draw_artists()
+        self.canvas.blit(self.ax.bbox)
 
 
 class RobotGUI:
     def __init__(self, root):
+        load_gui()
         self.root = root
         self.root.title("Symulator Robota RRR")
         
@@ -99,15 +1160,49 @@ class RobotGUI:
         
         self.root.bind('<Escape>', lambda e: self.root.state('normal'))
         self.root.bind('<F11>', lambda e: self.toggle_fullscreen())
+        self.root.bind('<F12>', lambda e: self.toggle_profiler())
         
         self.fullscreen = False
         
-        # Inicjalizacja robota
-        self.robot = RobotRRR(L1=1.0, L2=1.0, L3=1.0)
+        # Inicjalizacja robota (z pamięcią podręczną wyników IK dla powtarzanych zapytań)
+        self.robot = RobotRRR(L1=1.0, L2=1.0, L3=1.0, ik_cache=IKCache())
         self.current_angles = [0, 0, 0]
         self.trajectory = None
+        self.trajectory_angles = None
+        self.trajectory_times = None
         self.animation = None
+        self.animation_interval = 50
+        self.max_joint_velocity = DEFAULT_MAX_VELOCITY
+        self.max_joint_acceleration = DEFAULT_MAX_ACCELERATION
         self.current_frame = 0
+        self.playback = None
+        self.playback_speed = 1.0
+        self.trajectory_rate = 1000 / self.animation_interval
+        self.updating_seek = False
+        self.show_profiler = False
+        self.overlay_updated = 0.0
+        
+        # Ślad efektora; trail_length = None oznacza pełny ślad, liczba - bufor cykliczny
+        self.trail_length = None
+        self.trail = TrailBuffer(1)
+        self.trail_frame = -1
+        
+        # Zmiany suwaków są łączone w jedno przeliczenie i odświeżenie na klatkę;
+        # max_fps = None oznacza odświeżenie przy pierwszej bezczynności pętli Tk
+        self.max_fps = 60
+        self.redraw_job = None
+        self.last_redraw = 0.0
+        self.pending_lengths = False
+        self.pending_angles = False
+        
+        # Mapy obszaru roboczego dla ostatnio używanych długości ogniw i ograniczeń
+        from workspace import WorkspaceCache
+        self.workspace_cache = WorkspaceCache(resolution=48)
+        
+        # Indeks konfiguracji do proponowania najbliższej osiągalnej pozycji
+        from cspace_index import ConfigurationIndex
+        self.cspace_index = ConfigurationIndex(self.robot)
+        self.applied_limits = [[-180, 180], [-180, 180], [-180, 180]]
         
         self.setup_ui()
         self.update_plot()
@@ -188,6 +1283,10 @@ class RobotGUI:
         self.L3_label = ttk.Label(length_frame, text="1.00", width=5)
         self.L3_label.grid(row=2, column=2)
         
+        self.show_workspace = tk.BooleanVar(value=False)
+        ttk.Checkbutton(length_frame, text="Pokaż obszar roboczy", variable=self.show_workspace,
+                        command=self.toggle_workspace).grid(row=3, column=0, columnspan=3, sticky="w")
+        
         length_frame.columnconfigure(1, weight=1)
         
         limits_frame = self.create_collapsible_section(control_frame, "Ograniczenia Kątów")
@@ -287,7 +1386,7 @@ class RobotGUI:
         ttk.Label(ik_frame, text="Konfiguracja:").grid(row=3, column=0, sticky="w")
         self.elbow_config = tk.StringVar(value="Elbow Down")
         elbow_combo = ttk.Combobox(ik_frame, textvariable=self.elbow_config, 
-                                    values=["Elbow Up", "Elbow Down"], state="readonly", width=12)
+                                    values=["Elbow Up", "Elbow Down", "Najbliższe"], state="readonly", width=12)
         elbow_combo.grid(row=3, column=1, sticky="ew", padx=2, pady=2)
         
         ttk.Button(ik_frame, text="Oblicz IK", command=self.calculate_inverse).grid(
@@ -325,6 +1424,32 @@ class RobotGUI:
         ttk.Button(traj_frame, text="Stop Animacji", command=self.stop_animation).grid(
             row=5, column=0, columnspan=2, pady=5, sticky="ew")
         
+        ttk.Button(traj_frame, text="Pauza / Wznów", command=self.toggle_pause).grid(
+            row=6, column=0, columnspan=2, pady=5, sticky="ew")
+        
+        ttk.Label(traj_frame, text="Prędkość:").grid(row=7, column=0, sticky="w")
+        self.speed_var = tk.StringVar(value="1x")
+        speed_combo = ttk.Combobox(traj_frame, textvariable=self.speed_var,
+                                   values=["0.25x", "0.5x", "1x", "2x", "4x"], state="readonly", width=12)
+        speed_combo.grid(row=7, column=1, sticky="ew", padx=2, pady=2)
+        speed_combo.bind("<<ComboboxSelected>>", lambda e: self.set_playback_speed())
+        
+        ttk.Label(traj_frame, text="Pozycja:").grid(row=8, column=0, sticky="w")
+        self.seek_var = tk.DoubleVar(value=0.0)
+        ttk.Scale(traj_frame, from_=0.0, to=1.0, orient=tk.HORIZONTAL, variable=self.seek_var,
+                  command=lambda value: self.seek_animation(float(value))).grid(
+            row=8, column=1, sticky="ew", padx=2)
+        
+        self.playback_info = tk.StringVar(value="Klatka: -")
+        ttk.Label(traj_frame, textvariable=self.playback_info, font=("Arial", 8)).grid(
+            row=9, column=0, columnspan=2, sticky="w")
+        
+        ttk.Button(traj_frame, text="Zapisz Trajektorię", command=self.save_trajectory).grid(
+            row=10, column=0, columnspan=2, pady=5, sticky="ew")
+        
+        ttk.Button(traj_frame, text="Wczytaj Trajektorię", command=self.load_trajectory).grid(
+            row=11, column=0, columnspan=2, pady=5, sticky="ew")
+        
         traj_frame.columnconfigure(1, weight=1)
         
         # Współrzędne przegubów
@@ -378,18 +1503,62 @@ class RobotGUI:
         
         self.canvas = FigureCanvasTkAgg(self.fig, master=plot_frame)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.plot = RobotPlot(self.ax)
         
     def update_lengths(self, event=None):
-        self.robot.L1 = self.L1_var.get()
-        self.robot.L2 = self.L2_var.get()
-        self.robot.L3 = self.L3_var.get()
-        
-        self.L1_label.config(text=f"{self.L1_var.get():.2f}")
-        self.L2_label.config(text=f"{self.L2_var.get():.2f}")
-        self.L3_label.config(text=f"{self.L3_var.get():.2f}")
+        self.pending_lengths = True
+        self.schedule_redraw()
+    
+    def schedule_redraw(self):
+        if self.redraw_job is not None:
+            return
+        if self.max_fps is None:
+            self.redraw_job = self.root.after_idle(self.flush_redraw)
+        else:
+            delay = self.last_redraw + 1.0 / self.max_fps - time.perf_counter()
+            self.redraw_job = self.root.after(max(int(delay * 1000), 0), self.flush_redraw)
+    
+    def flush_redraw(self):
+        # Przeliczenie na najnowszych wartościach suwaków - stany pośrednie są pomijane
+        self.redraw_job = None
+        self.last_redraw = time.perf_counter()
+        
+        if self.pending_lengths:
+            self.pending_lengths = False
+            self.robot.L1 = self.L1_var.get()
+            self.robot.L2 = self.L2_var.get()
+            self.robot.L3 = self.L3_var.get()
+            
+            self.L1_label.config(text=f"{self.L1_var.get():.2f}")
+            self.L2_label.config(text=f"{self.L2_var.get():.2f}")
+            self.L3_label.config(text=f"{self.L3_var.get():.2f}")
+            self.update_workspace()
+        
+        if self.pending_angles:
+            self.pending_angles = False
+            self.current_angles = [
+                self.theta1_var.get(),
+                self.theta2_var.get(),
+                self.theta3_var.get()
+            ]
+            
+            self.theta1_label.config(text=f"{self.theta1_var.get():.2f}")
+            self.theta2_label.config(text=f"{self.theta2_var.get():.2f}")
+            self.theta3_label.config(text=f"{self.theta3_var.get():.2f}")
         
         self.update_plot()
     
+    def update_workspace(self):
+        if not self.show_workspace.get():
+            self.plot.set_workspace(None)
+            return
+        workspace = self.workspace_cache.get(self.robot, self.applied_limits)
+        self.plot.set_workspace(workspace.boundary_points(max_points=3000))
+    
+    def toggle_workspace(self):
+        self.update_workspace()
+        self.plot.refresh()
+    
     def apply_limits(self):
         try:
             # Wartości ograniczeń
@@ -409,6 +1578,10 @@ class RobotGUI:
             self.theta2_scale.config(from_=theta2_min, to=theta2_max)
             self.theta3_scale.config(from_=theta3_min, to=theta3_max)
             
+            self.applied_limits = [[theta1_min, theta1_max], [theta2_min, theta2_max],
+                                   [theta3_min, theta3_max]]
+            self.update_workspace()
+            
             if self.theta1_var.get() < theta1_min:
                 self.theta1_var.set(theta1_min)
             elif self.theta1_var.get() > theta1_max:
@@ -431,25 +1604,10 @@ class RobotGUI:
             messagebox.showerror("Błąd", "Wprowadź poprawne wartości liczbowe dla ograniczeń!")
         
     def update_forward(self, event=None):
-        self.current_angles = [
-            self.theta1_var.get(),
-            self.theta2_var.get(),
-            self.theta3_var.get()
-        ]
+        self.pending_angles = True
+        self.schedule_redraw()
         
-        self.theta1_label.config(text=f"{self.theta1_var.get():.2f}")
-        self.theta2_label.config(text=f"{self.theta2_var.get():.2f}")
-        self.theta3_label.config(text=f"{self.theta3_var.get():.2f}")
-        
-        self.update_plot()
-        
-    def update_plot(self):
-        self.ax.clear()
-        
-        # Obliczenie pozycji
-        positions, end_pos = self.robot.forward_kinematics(*self.current_angles)
-        
-        # Aktualizacja współrzędnych przegubów
+    def update_coordinates(self, positions):
         self.base_x.config(text=f"{positions[0, 0]:.2f}")
         self.base_y.config(text=f"{positions[0, 1]:.2f}")
         self.base_z.config(text=f"{positions[0, 2]:.2f}")
@@ -465,36 +1623,63 @@ class RobotGUI:
         self.effector_x.config(text=f"{positions[3, 0]:.2f}")
         self.effector_y.config(text=f"{positions[3, 1]:.2f}")
         self.effector_z.config(text=f"{positions[3, 2]:.2f}")
+    
+    def update_plot(self):
+        start = time.perf_counter()
         
-        # Rysowanie robota
-        self.ax.plot(positions[:, 0], positions[:, 1], positions[:, 2], 
-                    'o-', linewidth=3, markersize=8, color='blue', label='Robot')
-        
-        # Rysowanie podstawy
-        self.ax.plot([0], [0], [0], 'rs', markersize=12, label='Podstawa')
-        
-        # Rysowanie efektora
-        self.ax.plot([end_pos[0]], [end_pos[1]], [end_pos[2]], 
-                    'g*', markersize=15, label='Efektor')
-        
-        # Ustawienia wykresu
-        max_reach = self.robot.L1 + self.robot.L2 + self.robot.L3
-        self.ax.set_xlim([-max_reach, max_reach])
-        self.ax.set_ylim([-max_reach, max_reach])
-        self.ax.set_zlim([0, max_reach * 1.2])
-        
-        self.ax.set_xlabel('X')
-        self.ax.set_ylabel('Y')
-        self.ax.set_zlabel('Z')
-        self.ax.set_title('Robot RRR')
-        self.ax.legend()
-        self.ax.grid(True)
+        # Obliczenie pozycji
+        with PROFILER.phase('update_plot.fk'):
+            positions, end_pos = self.robot.forward_kinematics(*self.current_angles)
         
-        # Aktualizacja wyniku kinematyki prostej
-        self.fk_result.set(f"Pozycja: ({end_pos[0]:.2f}, {end_pos[1]:.2f}, {end_pos[2]:.2f})")
+        # Aktualizacja współrzędnych przegubów
+        with PROFILER.phase('update_plot.labels'):
+            self.update_coordinates(positions)
+            # Aktualizacja wyniku kinematyki prostej
+            self.fk_result.set(f"Pozycja: ({end_pos[0]:.2f}, {end_pos[1]:.2f}, {end_pos[2]:.2f})")
+        
+        with PROFILER.phase('update_plot.artists'):
+            # Ustawienia wykresu (przeliczane tylko przy zmianie długości ogniw)
+            self.plot.set_reach(self.robot.L1 + self.robot.L2 + self.robot.L3)
+            self.plot.set_title('Robot RRR')
+            
+            # Rysowanie robota i efektora
+            self.plot.set_robot(positions)
+            self.plot.set_trail(None)
+            self.update_overlay()
         
-        self.canvas.draw()
+        # Czas blitowania albo - bez buforowanego tła - samego zlecenia przerysowania
+        with PROFILER.phase('update_plot.blit' if self.plot.blitting else 'update_plot.draw_idle'):
+            self.plot.refresh()
         
+        if PROFILER.enabled:
+            PROFILER.add('update_plot', time.perf_counter() - start)
+    
+    def update_overlay(self):
+        # Nakładka odświeżana co pół sekundy, aby nie obciążać każdej klatki
+        now = time.perf_counter()
+        if self.show_profiler and now - self.overlay_updated > 0.5:
+            self.overlay_updated = now
+            report = PROFILER.report()
+            if self.playback is not None:
+                report += f"\nutracone klatki: {self.playback.dropped}"
+            self.plot.set_overlay(report)
+        
+    def toggle_profiler(self):
+        # Włączenie pomiarów i nakładki ze statystykami (F12)
+        self.show_profiler = not self.show_profiler
+        PROFILER.enabled = self.show_profiler
+        if self.show_profiler:
+            PROFILER.reset()
+        self.plot.set_overlay(PROFILER.report() if self.show_profiler else None)
+        self.plot.refresh()
+        
+    def get_limits(self):
+        return [
+            [self.theta1_min.get(), self.theta1_max.get()],
+            [self.theta2_min.get(), self.theta2_max.get()],
+            [self.theta3_min.get(), self.theta3_max.get()],
+        ]
+    
     def calculate_inverse(self):
         try:
             x = float(self.x_entry.get())
@@ -502,45 +1687,75 @@ class RobotGUI:
             z = float(self.z_entry.get())
             
             # Sprawdź konfigurację
-            elbow_up = (self.elbow_config.get() == "Elbow Up")
-            
-            result = self.robot.inverse_kinematics(x, y, z, elbow_up=elbow_up)
-            if result is None:
-                self.ik_result.set("Pozycja nieosiągalna!")
-                messagebox.showwarning("Błąd", "Podana pozycja jest poza zasięgiem robota!")
-                return
-            theta1, theta2, theta3 = result
-            # Sprawdź ograniczenia kątów
-            if not (self.theta1_min.get() <= theta1 <= self.theta1_max.get() and
-                    self.theta2_min.get() <= theta2 <= self.theta2_max.get() and
-                    self.theta3_min.get() <= theta3 <= self.theta3_max.get()):
-                self.ik_result.set("Pozycja nieosiągalna przez ograniczenia!")
-                messagebox.showwarning("Błąd", "Pozycja wykracza poza ograniczenia kątów!")
-                return
+            if self.elbow_config.get() == "Najbliższe":
+                # Rozwiązanie spełniające ograniczenia, najbliższe bieżącej pozycji
+                with PROFILER.phase('calculate_inverse.ik'):
+                    result = self.robot.inverse_kinematics_nearest(
+                        x, y, z, self.current_angles, limits=self.get_limits()
+                    )
+                if result is None:
+                    if self.robot.inverse_kinematics(x, y, z) is None:
+                        result = self.suggest_nearest(x, y, z, "Pozycja nieosiągalna!",
+                                                      "Podana pozycja jest poza zasięgiem robota!")
+                    else:
+                        result = self.suggest_nearest(x, y, z, "Pozycja nieosiągalna przez ograniczenia!",
+                                                      "Pozycja wykracza poza ograniczenia kątów!")
+                    if result is None:
+                        return
+                theta1, theta2, theta3 = result
+            else:
+                elbow_up = (self.elbow_config.get() == "Elbow Up")
+                
+                with PROFILER.phase('calculate_inverse.ik'):
+                    result = self.robot.inverse_kinematics(x, y, z, elbow_up=elbow_up)
+                if result is None:
+                    result = self.suggest_nearest(x, y, z, "Pozycja nieosiągalna!",
+                                                  "Podana pozycja jest poza zasięgiem robota!")
+                # Sprawdź ograniczenia kątów
+                elif not within_limits(result, self.get_limits()):
+                    result = self.suggest_nearest(x, y, z, "Pozycja nieosiągalna przez ograniczenia!",
+                                                  "Pozycja wykracza poza ograniczenia kątów!")
+                if result is None:
+                    return
+                theta1, theta2, theta3 = result
             self.ik_result.set(f"Kąty:\nθ1 = {theta1:.2f}°\nθ2 = {theta2:.2f}°\nθ3 = {theta3:.2f}°")
             
             # Zapisz kąty docelowe dla animacji
             self.animation_target_angles = [theta1, theta2, theta3]
             
             target_angles = [theta1, theta2, theta3]
-            self.trajectory = self.robot.generate_trajectory(
-                self.current_angles, target_angles, steps=50
-            )
-            self.current_frame = 0
-            if self.animation is not None:
-                try:
-                    self.animation.event_source.stop()
-                except:
-                    pass
-                self.animation = None
-            self.animation = FuncAnimation(
-                self.fig, self.animate, frames=len(self.trajectory),
-                interval=50, repeat=False, blit=False
-            )
-            self.canvas.draw()
+            with PROFILER.phase('calculate_inverse.trajectory'):
+                self.trajectory, self.trajectory_angles, self.trajectory_times = self.plan_motion(
+                    target_angles)
+            self.run_animation()
         except ValueError:
             messagebox.showerror("Błąd", "Wprowadź poprawne wartości liczbowe!")
             
+    def suggest_nearest(self, x, y, z, status, message):
+        # Zamiast samego komunikatu o błędzie proponowana jest najbliższa pozycja
+        # osiągalna w granicach ograniczeń; zwraca jej kąty albo None po odmowie
+        with PROFILER.phase('calculate_inverse.nearest'):
+            angles, effector, distance = self.cspace_index.nearest(x, y, z, self.get_limits())
+        self.ik_result.set(status)
+        question = (f"{message}\n\nNajbliższa osiągalna pozycja: "
+                    f"({effector[0]:.3f}, {effector[1]:.3f}, {effector[2]:.3f}), "
+                    f"odległość {distance:.3f}.\nCzy przejść do tej pozycji?")
+        if not messagebox.askyesno("Błąd", question):
+            return None
+        return angles
+    
+    def plan_motion(self, target_angles):
+        # Ruch z bieżącej pozycji z ograniczeniami prędkości i przyspieszenia; jedna
+        # próbka na klatkę animacji, więc liczba klatek zależy od długości ruchu.
+        # Zwraca pozycje przegubów, kąty i czasy próbek planu (ostatni odstęp jest
+        # krótszy - czasy zapisywane są do pliku trajektorii)
+        motion = plan_joint_trajectory(
+            [self.current_angles, target_angles], self.max_joint_velocity,
+            self.max_joint_acceleration, rate=1000 / self.animation_interval
+        )
+        positions, _ = self.robot.forward_kinematics_batch(motion.angles)
+        return positions, motion.angles, motion.times
+    
     def start_animation(self):
         try:
             target_angles = [
@@ -552,89 +1767,184 @@ class RobotGUI:
             self.animation_target_angles = target_angles
             
             # Generowanie trajektorii
-            self.trajectory = self.robot.generate_trajectory(
-                self.current_angles, target_angles, steps=50
-            )
-            self.current_frame = 0
-            
-            # Zatrzymanie i wyczyszczenie poprzedniej animacji
-            if self.animation is not None:
-                try:
-                    self.animation.event_source.stop()
-                except:
-                    pass
-                self.animation = None
-            
-            # Utworzenie nowej animacji
-            self.animation = FuncAnimation(
-                self.fig, self.animate, frames=len(self.trajectory),
-                interval=50, repeat=False, blit=False
-            )
-            self.canvas.draw()
+            self.trajectory, self.trajectory_angles, self.trajectory_times = self.plan_motion(
+                target_angles)
+            self.run_animation()
             
         except ValueError:
             messagebox.showerror("Błąd", "Wprowadź poprawne wartości kątów!")
         except Exception as e:
             messagebox.showerror("Błąd", f"Wystąpił błąd: {str(e)}")
             
+    def save_trajectory(self):
+        if self.trajectory_angles is None:
+            messagebox.showwarning("Błąd", "Brak trajektorii do zapisania!")
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".rrrt",
+                                            filetypes=[("Trajektoria RRR", "*.rrrt")])
+        if not path:
+            return
+        from trajfile import save_trajectory
+        try:
+            save_trajectory(path, self.trajectory_times, self.trajectory_angles,
+                            (self.robot.L1, self.robot.L2, self.robot.L3),
+                            self.applied_limits, positions=self.trajectory)
+        except OSError as e:
+            messagebox.showerror("Błąd", f"Nie można zapisać pliku: {e}")
+    
+    def load_trajectory(self):
+        path = filedialog.askopenfilename(filetypes=[("Trajektoria RRR", "*.rrrt")])
+        if not path:
+            return
+        from trajfile import TrajectoryReader
+        try:
+            reader = TrajectoryReader(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Błąd", f"Nie można wczytać pliku: {e}")
+            return
+        if len(reader) == 0:
+            messagebox.showwarning("Błąd", "Plik nie zawiera klatek trajektorii!")
+            return
+        
+        # Odtwarzanie z widoków na plik zmapowany w pamięci, z długościami ogniw z nagłówka
+        self.L1_var.set(reader.lengths[0])
+        self.L2_var.set(reader.lengths[1])
+        self.L3_var.set(reader.lengths[2])
+        self.update_lengths()
+        
+        self.trajectory = reader.positions
+        self.trajectory_angles = reader.angles
+        self.trajectory_times = reader.times
+        self.animation_target_angles = [float(angle) for angle in reader.angles[-1]]
+        
+        # Odtwarzanie w czasie zapisanym w pliku
+        times = reader.times
+        rate = None
+        if len(times) > 1 and times[-1] > times[0]:
+            rate = (len(times) - 1) / float(times[-1] - times[0])
+        self.run_animation(rate)
+    
+    def run_animation(self, rate=None):
+        # Zatrzymanie poprzedniej animacji i uruchomienie nowej od pierwszej klatki.
+        # rate: liczba próbek trajektorii na sekundę (domyślnie jedna na takt zegara)
+        self.stop_animation()
+        self.current_frame = 0
+        self.trajectory_rate = 1000 / self.animation_interval if rate is None else rate
+        PROFILER.reset_frames()
+        if self.trail_length is None:
+            self.trail = TrailBuffer(len(self.trajectory))
+        else:
+            self.trail = TrailBuffer(self.trail_length, ring=True)
+        self.trail_frame = -1
+        self.playback = AnimationClock(len(self.trajectory), self.trajectory_rate, self.playback_speed,
+                                       tick_rate=1000 / self.animation_interval)
+        self.playback.start()
+        self.update_seek(0)
+        self.start_timer()
+    
+    def start_timer(self):
+        self.animation = self.canvas.new_timer(interval=self.animation_interval)
+        self.animation.add_callback(self.next_frame)
+        self.animation.start()
+    
+    def next_frame(self):
+        # Takt zegara: wyświetlenie próbki odpowiadającej bieżącemu czasowi odtwarzania
+        if self.trajectory is None or self.playback is None:
+            self.stop_animation()
+            return
+        frame = self.playback.next_frame()
+        if frame is not None:
+            self.current_frame = frame
+            self.animate(frame)
+            self.update_seek(frame)
+        if self.playback.finished:
+            self.stop_animation()
+            
     def stop_animation(self):
+        # Zatrzymanie zegara odtwarzania razem z timerem - inaczej wznowienie albo
+        # przewinięcie przeskoczyłoby o czas, który upłynął od zatrzymania
         if self.animation is not None:
-            try:
-                self.animation.event_source.stop()
-            except:
-                pass
+            self.animation.stop()
             self.animation = None
+        if self.playback is not None:
+            self.playback.pause()
+    
+    def toggle_pause(self):
+        if self.playback is None or self.trajectory is None:
+            return
+        if self.animation is not None:
+            self.stop_animation()
+        else:
+            if self.playback.finished:
+                self.playback.seek(0)
+            self.playback.start()
+            self.start_timer()
+    
+    def set_playback_speed(self):
+        self.playback_speed = float(self.speed_var.get().rstrip('x'))
+        if self.playback is not None:
+            self.playback.set_speed(self.playback_speed)
+    
+    def update_seek(self, frame):
+        # Suwak pozycji podąża za odtwarzaniem; flaga updating_seek blokuje
+        # zwrotne wywołanie seek_animation przy programowej zmianie suwaka
+        self.updating_seek = True
+        try:
+            self.seek_var.set(frame / max(len(self.trajectory) - 1, 1))
+        finally:
+            self.updating_seek = False
+    
+    def seek_animation(self, fraction):
+        # Przewinięcie do ułamka fraction długości trajektorii; w pauzie (lub po
+        # zakończeniu) klatka rysowana jest od razu
+        if self.updating_seek or self.playback is None or self.trajectory is None:
+            return
+        frame = int(round(fraction * (len(self.trajectory) - 1)))
+        self.playback.seek(frame)
+        if self.animation is None:
+            self.playback.last_frame = frame
+            self.current_frame = frame
+            self.animate(frame)
             
     def animate(self, frame):
         if frame >= len(self.trajectory):
             return
+        start = time.perf_counter()
+        PROFILER.frame(requested_fps=1000 / self.animation_interval)
         
-        self.ax.clear()
         positions = self.trajectory[frame]
+        with PROFILER.phase('animate.labels'):
+            self.update_coordinates(positions)
         
-        self.base_x.config(text=f"{positions[0, 0]:.2f}")
-        self.base_y.config(text=f"{positions[0, 1]:.2f}")
-        self.base_z.config(text=f"{positions[0, 2]:.2f}")
-        
-        self.joint1_x.config(text=f"{positions[1, 0]:.2f}")
-        self.joint1_y.config(text=f"{positions[1, 1]:.2f}")
-        self.joint1_z.config(text=f"{positions[1, 2]:.2f}")
-        
-        self.joint2_x.config(text=f"{positions[2, 0]:.2f}")
-        self.joint2_y.config(text=f"{positions[2, 1]:.2f}")
-        self.joint2_z.config(text=f"{positions[2, 2]:.2f}")
-        
-        self.effector_x.config(text=f"{positions[3, 0]:.2f}")
-        self.effector_y.config(text=f"{positions[3, 1]:.2f}")
-        self.effector_z.config(text=f"{positions[3, 2]:.2f}")
-        
-        # Rysowanie robota w bieżącej pozycji
-        self.ax.plot(positions[:, 0], positions[:, 1], positions[:, 2], 
-                    'o-', linewidth=3, markersize=8, color='blue', label='Robot')
-        
-        # Rysowanie śladu trajektorii
-        if frame > 0:
-            trail = np.array([self.trajectory[i][-1] for i in range(frame + 1)])
-            self.ax.plot(trail[:, 0], trail[:, 1], trail[:, 2], 
-                        'r--', linewidth=1, alpha=0.5, label='Trajektoria')
+        with PROFILER.phase('animate.artists'):
+            self.plot.set_reach(self.robot.L1 + self.robot.L2 + self.robot.L3)
+            self.plot.set_title('Robot RRR - Animacja Trajektorii')
+            
+            # Dopisanie do śladu pozycji efektora od ostatnio narysowanej klatki
+            if frame <= self.trail_frame:
+                self.trail.clear()
+                self.trail_frame = -1
+            self.trail.extend(self.trajectory[self.trail_frame + 1:frame + 1, -1])
+            self.trail_frame = frame
+            
+            # Rysowanie robota w bieżącej pozycji i śladu trajektorii
+            self.plot.set_robot(positions)
+            if frame > 0:
+                self.plot.set_trail(self.trail.view())
+            else:
+                self.plot.set_trail(None)
+            self.update_overlay()
         
-        # Podstawa i efektor
-        self.ax.plot([0], [0], [0], 'rs', markersize=12, label='Podstawa')
-        self.ax.plot([positions[-1, 0]], [positions[-1, 1]], [positions[-1, 2]], 
-                    'g*', markersize=15, label='Efektor')
+        if self.playback is not None:
+            self.playback_info.set(f"Klatka: {frame + 1} / {len(self.trajectory)}, "
+                                   f"utracone: {self.playback.dropped}")
         
-        # Ustawienia
-        max_reach = self.robot.L1 + self.robot.L2 + self.robot.L3
-        self.ax.set_xlim([-max_reach, max_reach])
-        self.ax.set_ylim([-max_reach, max_reach])
-        self.ax.set_zlim([0, max_reach * 1.2])
+        # Czas blitowania albo - bez buforowanego tła - samego zlecenia przerysowania
+        with PROFILER.phase('animate.blit' if self.plot.blitting else 'animate.draw_idle'):
+            self.plot.refresh()
         
-        self.ax.set_xlabel('X')
-        self.ax.set_ylabel('Y')
-        self.ax.set_zlabel('Z')
-        self.ax.set_title(f'Robot RRR - Animacja Trajektorii')
-        self.ax.legend()
-        self.ax.grid(True)
+        if PROFILER.enabled:
+            PROFILER.add('animate', time.perf_counter() - start)
         
         if frame == len(self.trajectory) - 1:
             if hasattr(self, 'animation_target_angles'):
@@ -657,6 +1967,7 @@ class RobotGUI:
 
 
 def main():
+    load_gui()
     root = tk.Tk()
     app = RobotGUI(root)
     root.mainloop()
@@ -0,0 +1,394 @@
+"""Lokalna usługa kinematyki robota RRR (asyncio, gniazdo Unix albo TCP na localhost).
+
+Serwer obsługuje żądania FK, IK i trajektorii dla nazwanych konfiguracji robota.
+Żądania napływające w krótkim oknie czasu (window) są łączone w mikropartie
+i liczone jedną operacją tablicową, a wyniki odsyłane tymi samymi połączeniami.
+Liczba żądań w toku jest ograniczona (max_pending): po jej przekroczeniu serwer
+przestaje czytać z gniazd, więc nadawcy są spowalniani przez kontrolę przepływu.
+
+Ramka (little endian): nagłówek FRAME_HEADER - długość danych, identyfikator żądania,
+operacja, flagi (w odpowiedzi: status) i długość nazwy robota - a po nim nazwa
+(UTF-8) i dane float64:
+    OP_FK          kąty (N, 3) [°]                    -> pozycje przegubów (N, 4, 3)
+    OP_IK          punkty (M, 3); flagi: ELBOW_*      -> kąty i znacznik ok (M, 4)
+                   dla IK_NEAREST najpierw seed (3)
+    OP_TRAJECTORY  TRAJECTORY_HEADER, start (3), koniec (3); flagi: indeks profilu
+                                                      -> pozycje przegubów (steps, 4, 3)
+    OP_METRICS     -                                  -> statystyki (JSON)
+Odpowiedź ze statusem STATUS_ERROR zawiera opis błędu (UTF-8).
+
+    python service.py --port 8765 --robot cell1 1 1 1 --robot cell2 0.5 1.2 0.8
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import struct
+import time
+
+import numpy as np
+
+from rrr import ELBOW_DOWN, ELBOW_UP, TIME_SCALING_PROFILES, Profiler, RobotRRR, within_limits
+
+FRAME_HEADER = struct.Struct('<IIBBH')
+TRAJECTORY_HEADER = struct.Struct('<Id')
+MAX_FRAME = 64 << 20
+
+OP_FK = 1
+OP_IK = 2
+OP_TRAJECTORY = 3
+OP_METRICS = 4
+
+OP_NAMES = {OP_FK: 'fk', OP_IK: 'ik', OP_TRAJECTORY: 'trajectory', OP_METRICS: 'metrics'}
+
+IK_ELBOW_DOWN = 0
+IK_ELBOW_UP = 1
+IK_NEAREST = 2
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+PROFILE_NAMES = list(TIME_SCALING_PROFILES)
+
+
+def pack_frame(request_id, op, flags, name=b'', payload=b''):
+    return FRAME_HEADER.pack(len(name) + len(payload), request_id, op, flags, len(name)) + name + payload
+
+
+async def read_frame(reader):
+    # Zwraca (id, operacja, flagi, nazwa, dane) albo None po zamknięciu połączenia
+    try:
+        header = await reader.readexactly(FRAME_HEADER.size)
+        length, request_id, op, flags, name_length = FRAME_HEADER.unpack(header)
+        if length > MAX_FRAME or name_length > length:
+            raise ValueError(f"Nieprawidłowa ramka o długości {length}")
+        body = await reader.readexactly(length)
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None
+    return request_id, op, flags, body[:name_length].decode(), body[name_length:]
+
+
+class KinematicsService:
+    def __init__(self, robots=None, window=0.001, max_batch=4096, max_pending=10000):
+        # robots: słownik nazwa -> RobotRRR; window: czas zbierania mikropartii [s];
+        # max_batch: liczba wierszy wymuszająca natychmiastowe przeliczenie partii
+        self.robots = {}
+        self.limits = {}
+        for name, robot in (robots or {}).items():
+            self.add_robot(name, robot)
+        self.window = window
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.slots = asyncio.Semaphore(max_pending)
+        self.pending = 0
+        self.batches = {}
+        self.server = None
+        self.address = None
+        self.latency = Profiler(enabled=True, window=2000)
+        self.reset_metrics()
+
+    def add_robot(self, name, robot, limits=None):
+        self.robots[name] = robot
+        self.limits[name] = limits
+
+    def reset_metrics(self):
+        self.started = time.perf_counter()
+        self.requests = 0
+        self.rows = 0
+        self.batch_count = 0
+        self.errors = 0
+        self.latency.reset()
+
+    def metrics(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            'requests': self.requests,
+            'rows': self.rows,
+            'batches': self.batch_count,
+            'errors': self.errors,
+            'mean_batch_requests': self.requests / self.batch_count if self.batch_count else 0.0,
+            'pending': self.pending,
+            'requests_per_s': self.requests / elapsed if elapsed > 0 else 0.0,
+            'rows_per_s': self.rows / elapsed if elapsed > 0 else 0.0,
+            'latency': self.latency.stats()['phases'],
+        }
+
+    # Mikropartie
+
+    def submit(self, name, op, flags, payload):
+        # Dodaje żądanie do partii; zwraca future z wynikiem (bajty odpowiedzi)
+        future = asyncio.get_running_loop().create_future()
+        try:
+            key, rows = self._parse(name, op, flags, payload)
+        except Exception as e:
+            self.requests += 1
+            self.errors += 1
+            future.set_exception(ValueError(str(e) or type(e).__name__))
+            return future
+
+        batch = self.batches.get(key)
+        if batch is None:
+            batch = self.batches[key] = {'requests': [], 'rows': 0}
+            batch['timer'] = asyncio.get_running_loop().call_later(self.window, self._flush, key)
+        batch['requests'].append((rows, future, time.perf_counter()))
+        batch['rows'] += len(rows)
+        if batch['rows'] >= self.max_batch:
+            batch['timer'].cancel()
+            self._flush(key)
+        return future
+
+    def _parse(self, name, op, flags, payload):
+        # Klucz partii (żądania o tym samym kluczu liczone są razem) i wiersze danych
+        if name not in self.robots:
+            raise ValueError(f"Nieznany robot: {name}")
+        if op == OP_FK:
+            return (name, op, 0), np.frombuffer(payload, dtype='<f8').reshape(-1, 3)
+        if op == OP_IK:
+            rows = np.frombuffer(payload, dtype='<f8').reshape(-1, 3)
+            if flags == IK_NEAREST and len(rows) == 0:
+                raise ValueError("Brak konfiguracji odniesienia dla IK nearest")
+            if flags not in (IK_ELBOW_UP, IK_ELBOW_DOWN, IK_NEAREST):
+                raise ValueError(f"Nieznany wariant IK: {flags}")
+            return (name, op, flags), rows
+        if op == OP_TRAJECTORY:
+            if flags >= len(PROFILE_NAMES):
+                raise ValueError(f"Nieznany profil trajektorii: {flags}")
+            steps, duration = TRAJECTORY_HEADER.unpack_from(payload)
+            angles = np.frombuffer(payload, dtype='<f8', offset=TRAJECTORY_HEADER.size)
+            return (name, op, flags, steps, duration), angles.reshape(2, 3)
+        raise ValueError(f"Nieznana operacja: {op}")
+
+    def _flush(self, key):
+        batch = self.batches.pop(key, None)
+        if batch is None:
+            return
+        requests = batch['requests']
+        op = key[1]
+        start = time.perf_counter()
+        try:
+            try:
+                results = self._solve(key, [rows for rows, _, _ in requests])
+            except Exception as e:
+                # Dowolny błąd obliczeń (także np. TypeError dla poprawnej ramki
+                # z nieprawidłowymi danymi) trafia do wszystkich żądań partii
+                results = [ValueError(str(e) or type(e).__name__)] * len(requests)
+
+            finished = time.perf_counter()
+            self.latency.add(f'batch.{OP_NAMES[op]}', finished - start)
+            self.batch_count += 1
+            for (rows, future, received), result in zip(requests, results):
+                self.requests += 1
+                self.rows += len(rows)
+                self.latency.add(OP_NAMES[op], finished - received)
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    self.errors += 1
+                    future.set_exception(result)
+                else:
+                    future.set_result(np.ascontiguousarray(result, dtype='<f8').tobytes())
+        finally:
+            # Każde żądanie partii musi dostać odpowiedź - nierozstrzygnięty future
+            # blokowałby klienta i nigdy nie zwolniłby miejsca w self.slots
+            for _, future, _ in requests:
+                if not future.done():
+                    self.errors += 1
+                    future.set_exception(ValueError("Błąd przetwarzania partii"))
+
+    def _solve(self, key, inputs):
+        # Jedno wywołanie tablicowe dla całej partii, wynik dzielony na żądania
+        name, op, flags = key[:3]
+        robot = self.robots[name]
+        limits = self.limits[name]
+
+        if op == OP_TRAJECTORY:
+            steps, duration = key[3:]
+            angles = [robot.interpolate_joints(start, end, steps, PROFILE_NAMES[flags], duration)[0]
+                      for start, end in inputs]
+            positions, _ = robot.forward_kinematics_batch(np.concatenate(angles))
+            return np.split(positions, len(inputs))
+
+        if op == OP_IK and flags == IK_NEAREST:
+            # Pierwszy wiersz każdego żądania to konfiguracja odniesienia
+            seeds = np.concatenate([np.repeat(rows[:1], len(rows) - 1, axis=0) for rows in inputs])
+            targets = np.concatenate([rows[1:] for rows in inputs])
+            angles, found = robot.inverse_kinematics_nearest_batch(targets, seeds, limits)
+            result = np.column_stack([angles, found])
+            return np.split(result, np.cumsum([len(rows) - 1 for rows in inputs])[:-1])
+
+        rows = np.concatenate(inputs)
+        if op == OP_FK:
+            result, _ = robot.forward_kinematics_batch(rows)
+        else:
+            branch = ELBOW_UP if flags == IK_ELBOW_UP else ELBOW_DOWN
+            solutions, reachable = robot.inverse_kinematics_batch(rows)
+            ok = reachable & (within_limits(solutions[:, branch], limits) if limits is not None else True)
+            result = np.column_stack([solutions[:, branch], ok])
+        return np.split(result, np.cumsum([len(rows) for rows in inputs])[:-1])
+
+    # Połączenia
+
+    async def start(self, path=None, host='127.0.0.1', port=0):
+        # Gniazdo Unix (path) albo TCP; port 0 wybiera wolny port (self.address)
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self._handle, path=path)
+            self.address = path
+        else:
+            self.server = await asyncio.start_server(self._handle, host, port)
+            self.address = self.server.sockets[0].getsockname()[:2]
+        return self.server
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+        for key in list(self.batches):
+            self.batches[key]['timer'].cancel()
+            self._flush(key)
+
+    async def _handle(self, reader, writer):
+        def respond(request_id, op, future):
+            try:
+                if writer.is_closing():
+                    return
+                if future.exception() is not None:
+                    message = str(future.exception()).encode()
+                    writer.write(pack_frame(request_id, op, STATUS_ERROR, payload=message))
+                else:
+                    writer.write(pack_frame(request_id, op, STATUS_OK, payload=future.result()))
+            finally:
+                self.pending -= 1
+                self.slots.release()
+
+        try:
+            while True:
+                frame = await read_frame(reader)
+                if frame is None:
+                    break
+                request_id, op, flags, name, payload = frame
+                if op == OP_METRICS:
+                    writer.write(pack_frame(request_id, op, STATUS_OK,
+                                            payload=json.dumps(self.metrics()).encode()))
+                    continue
+                # Ograniczenie liczby żądań w toku i oczekiwanie na opróżnienie bufora
+                # zapisu - wolny klient nie może zapełnić pamięci serwera
+                await self.slots.acquire()
+                self.pending += 1
+                future = self.submit(name, op, flags, payload)
+                future.add_done_callback(lambda f, i=request_id, o=op: respond(i, o, f))
+                await writer.drain()
+        except ValueError:
+            pass
+        finally:
+            writer.close()
+
+
+class KinematicsClient:
+    # Klient asynchroniczny; wiele żądań może być w toku jednocześnie na jednym połączeniu
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.ids = itertools.count(1)
+        self.pending = {}
+        self.receiver = asyncio.get_running_loop().create_task(self._receive())
+
+    @classmethod
+    async def connect(cls, path=None, host='127.0.0.1', port=None):
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def _receive(self):
+        while True:
+            frame = await read_frame(self.reader)
+            if frame is None:
+                break
+            request_id, _, status, _, payload = frame
+            future = self.pending.pop(request_id, None)
+            if future is None or future.done():
+                continue
+            if status == STATUS_OK:
+                future.set_result(payload)
+            else:
+                future.set_exception(ValueError(payload.decode()))
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("Połączenie zamknięte"))
+        self.pending.clear()
+
+    async def request(self, op, flags=0, name='', payload=b''):
+        request_id = next(self.ids) & 0xFFFFFFFF
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        self.writer.write(pack_frame(request_id, op, flags, name.encode(), payload))
+        await self.writer.drain()
+        return await future
+
+    async def fk(self, name, angles):
+        # angles: (N, 3) [°]; zwraca pozycje przegubów (N, 4, 3)
+        payload = np.ascontiguousarray(angles, dtype='<f8').tobytes()
+        return np.frombuffer(await self.request(OP_FK, 0, name, payload)).reshape(-1, 4, 3)
+
+    async def ik(self, name, targets, elbow='down', seed=None):
+        # elbow: 'up', 'down' albo 'nearest' (z konfiguracją odniesienia seed);
+        # zwraca kąty (M, 3) i maskę poprawnych rozwiązań (M,)
+        targets = np.asarray(targets, dtype='<f8').reshape(-1, 3)
+        if elbow == 'nearest':
+            seed = np.zeros(3) if seed is None else seed
+            targets = np.vstack([np.asarray(seed, dtype='<f8').reshape(1, 3), targets])
+            flags = IK_NEAREST
+        else:
+            flags = IK_ELBOW_UP if elbow == 'up' else IK_ELBOW_DOWN
+        result = np.frombuffer(await self.request(OP_IK, flags, name, targets.tobytes())).reshape(-1, 4)
+        return result[:, :3], result[:, 3] > 0
+
+    async def trajectory(self, name, start_angles, end_angles, steps=50, profile='linear',
+                         duration=1.0):
+        if profile not in TIME_SCALING_PROFILES:
+            raise ValueError(f"Nieznany profil trajektorii: {profile}")
+        payload = (TRAJECTORY_HEADER.pack(steps, duration) +
+                   np.asarray([start_angles, end_angles], dtype='<f8').tobytes())
+        result = await self.request(OP_TRAJECTORY, PROFILE_NAMES.index(profile), name, payload)
+        return np.frombuffer(result).reshape(-1, 4, 3)
+
+    async def metrics(self):
+        return json.loads(await self.request(OP_METRICS))
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        await self.receiver
+
+
+async def serve(robots, path=None, host='127.0.0.1', port=8765, window=0.001):
+    service = KinematicsService(robots, window=window)
+    server = await service.start(path, host, port)
+    print(f"Usługa kinematyki: {service.address}")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lokalna usługa kinematyki robota RRR")
+    parser.add_argument('--socket', help="ścieżka gniazda Unix (zamiast TCP)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--window', type=float, default=0.001,
+                        help="czas zbierania mikropartii [s]")
+    parser.add_argument('--robot', nargs=4, action='append', metavar=('NAME', 'L1', 'L2', 'L3'),
+                        help="nazwana konfiguracja robota (można podać wielokrotnie)")
+    args = parser.parse_args(argv)
+
+    robots = {name: RobotRRR(float(L1), float(L2), float(L3))
+              for name, L1, L2, L3 in (args.robot or [['default', 1, 1, 1]])}
+    try:
+        asyncio.run(serve(robots, args.socket, args.host, args.port, args.window))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+"""Przegląd przestrzeni projektowej długości ogniw (L1, L2, L3).
+
+Każdy kandydat oceniany jest względem chmury punktów docelowych:
+    reachable_fraction - ułamek punktów osiągalnych w granicach ograniczeń kątów,
+    workspace_volume   - objętość obszaru roboczego (analitycznie dla pełnego zakresu
+                         kątów, w przeciwnym razie metodą Monte Carlo),
+    manipulability     - średnia miara manipulowalności |det J| w osiągalnych punktach.
+
+Kandydaci dzieleni są na fragmenty przetwarzane w puli procesów; punkty docelowe
+trafiają do pamięci współdzielonej (tylko do odczytu). Wyniki fragmentów zapisywane
+są w results_dir, więc przerwany przegląd można wznowić.
+
+    python sweep.py targets.npy --grid 100 --workers 8 --results-dir sweep_out --top 20
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from rrr import RobotRRR, wrapped_within_limits
+
+RESULT_DTYPE = np.dtype([
+    ('L1', 'f8'), ('L2', 'f8'), ('L3', 'f8'),
+    ('reachable_fraction', 'f8'),
+    ('workspace_volume', 'f8'),
+    ('manipulability', 'f8'),
+])
+
+# Zakres suwaków długości ogniw w GUI
+LENGTH_RANGE = (0.1, 2.0)
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def grid_candidates(count, low=LENGTH_RANGE[0], high=LENGTH_RANGE[1]):
+    # Regularna siatka count^3 kandydatów
+    values = np.linspace(low, high, count)
+    grid = np.meshgrid(values, values, values, indexing='ij')
+    return np.stack([g.ravel() for g in grid], axis=1)
+
+
+def random_candidates(count, low=LENGTH_RANGE[0], high=LENGTH_RANGE[1], seed=0):
+    return np.random.default_rng(seed).uniform(low, high, (count, 3))
+
+
+def volume_samples(count, seed=0):
+    # Losowe kierunki i ułamki objętości powłoki kulistej, wspólne dla wszystkich kandydatów
+    rng = np.random.default_rng(seed)
+    directions = rng.normal(size=(count, 3))
+    directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+    return directions, rng.uniform(size=count)
+
+
+def evaluate(candidates, targets, limits=None, samples=None):
+    # Ocena fragmentu kandydatów (C, 3) względem punktów (M, 3); zwraca tablicę RESULT_DTYPE
+    results = np.zeros(len(candidates), dtype=RESULT_DTYPE)
+
+    for i, (L1, L2, L3) in enumerate(candidates):
+        robot = RobotRRR(L1, L2, L3)
+        families, reachable = robot.inverse_kinematics_families(targets)
+        if limits is not None:
+            reachable = wrapped_within_limits(families, limits).any(axis=1)
+
+        # |det J| jest jednakowe dla wszystkich rodzin rozwiązań danego punktu
+        manipulability = np.abs(robot.jacobian_determinant(families[:, 0]))
+
+        # Powłoka kulista o promieniach |L2 - L3| i L2 + L3 wokół drugiego przegubu
+        r_min, r_max = abs(L2 - L3), L2 + L3
+        volume = 4 / 3 * np.pi * (r_max**3 - r_min**3)
+        if limits is not None:
+            directions, fractions = samples
+            radii = np.cbrt(r_min**3 + fractions * (r_max**3 - r_min**3))
+            points = directions * radii[:, None] + [0.0, 0.0, L1]
+            families, _ = robot.inverse_kinematics_families(points)
+            volume *= wrapped_within_limits(families, limits).any(axis=1).mean()
+
+        results[i] = (L1, L2, L3, reachable.mean(), volume,
+                      manipulability[reachable].mean() if reachable.any() else 0.0)
+    return results
+
+
+def rank(results):
+    # Najpierw największy ułamek osiągalnych punktów, potem manipulowalność i objętość
+    order = np.lexsort((-results['workspace_volume'], -results['manipulability'],
+                        -results['reachable_fraction']))
+    return results[order]
+
+
+# Stan procesu roboczego: widok na współdzielone punkty docelowe
+_worker = {}
+
+
+def _init_worker(shm_name, shape, limits, samples):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    targets = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    targets.flags.writeable = False
+    _worker.update(shm=shm, targets=targets, limits=limits, samples=samples)
+
+
+def _evaluate_chunk(index, candidates):
+    return index, evaluate(candidates, _worker['targets'], _worker['limits'], _worker['samples'])
+
+
+def _chunk_path(results_dir, index):
+    return os.path.join(results_dir, f"chunk_{index:06d}.npy")
+
+
+def sweep_key(candidates, targets, limits, chunk_size, volume_sample_count):
+    # Skrót wszystkiego, od czego zależą wyniki fragmentów i ich podział
+    digest = hashlib.sha256()
+    for array in (candidates, targets, limits):
+        if array is None:
+            digest.update(b'none')
+        else:
+            array = np.ascontiguousarray(array, dtype=np.float64)
+            digest.update(repr(array.shape).encode())
+            digest.update(array.tobytes())
+    digest.update(f"{chunk_size}:{volume_sample_count}".encode())
+    return digest.hexdigest()
+
+
+def _check_manifest(results_dir, key):
+    # Gotowe fragmenty wolno wczytać tylko, gdy pochodzą z przeglądu o tych samych
+    # danych; nowy katalog dostaje manifest przed zapisem pierwszego fragmentu
+    path = os.path.join(results_dir, MANIFEST_NAME)
+    if os.path.exists(path):
+        with open(path) as f:
+            manifest = json.load(f)
+        if manifest.get('key') != key:
+            raise ValueError(f"katalog {results_dir} zawiera wyniki przeglądu o innych danych "
+                             "(kandydaci, punkty, ograniczenia lub chunk_size)")
+        return
+    if any(name.startswith('chunk_') for name in os.listdir(results_dir)):
+        raise ValueError(f"katalog {results_dir} zawiera wyniki bez manifestu")
+    with open(path, 'w') as f:
+        json.dump({'key': key}, f)
+
+
+def sweep(candidates, targets, limits=None, workers=None, chunk_size=1000,
+          results_dir=None, volume_sample_count=512):
+    # Ocena wszystkich kandydatów; zwraca tablicę wyników posortowaną od najlepszego.
+    # Gotowe fragmenty z results_dir są wczytywane zamiast ponownie liczone.
+    candidates = np.asarray(candidates, dtype=float).reshape(-1, 3)
+    targets = np.ascontiguousarray(targets, dtype=np.float64).reshape(-1, 3)
+    samples = volume_samples(volume_sample_count) if limits is not None else None
+    if results_dir is not None:
+        os.makedirs(results_dir, exist_ok=True)
+        _check_manifest(results_dir, sweep_key(candidates, targets, limits, chunk_size,
+                                               volume_sample_count))
+
+    chunks = {}
+    pending = []
+    for index, start in enumerate(range(0, len(candidates), chunk_size)):
+        if results_dir is not None and os.path.exists(_chunk_path(results_dir, index)):
+            chunks[index] = np.load(_chunk_path(results_dir, index))
+        else:
+            pending.append((index, candidates[start:start + chunk_size]))
+
+    def finish(index, result):
+        chunks[index] = result
+        if results_dir is not None:
+            np.save(_chunk_path(results_dir, index), result)
+
+    if workers == 1:
+        for index, chunk in pending:
+            finish(index, evaluate(chunk, targets, limits, samples))
+    elif pending:
+        shm = shared_memory.SharedMemory(create=True, size=max(targets.nbytes, 1))
+        try:
+            np.ndarray(targets.shape, dtype=np.float64, buffer=shm.buf)[:] = targets
+            workers = workers or os.cpu_count() or 1
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(shm.name, targets.shape, limits, samples)) as pool:
+                # Ograniczona liczba zleconych fragmentów - wyniki zapisywane na bieżąco
+                max_in_flight = 2 * workers
+                queue = iter(pending)
+                in_flight = set()
+                while True:
+                    for index, chunk in queue:
+                        in_flight.add(pool.submit(_evaluate_chunk, index, chunk))
+                        if len(in_flight) >= max_in_flight:
+                            break
+                    if not in_flight:
+                        break
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        finish(*future.result())
+        finally:
+            shm.close()
+            shm.unlink()
+
+    if not chunks:
+        return np.zeros(0, dtype=RESULT_DTYPE)
+    return rank(np.concatenate([chunks[i] for i in sorted(chunks)]))
+
+
+def load_points(path):
+    if path.endswith('.npy'):
+        return np.load(path)
+    return np.loadtxt(path, delimiter=',', ndmin=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Przegląd długości ogniw robota RRR")
+    parser.add_argument('targets', help="punkty docelowe (M, 3): plik .npy albo CSV")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--grid', type=int, help="liczba wartości na oś siatki kandydatów")
+    group.add_argument('--random', type=int, help="liczba losowych kandydatów")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--limits', type=float, nargs=6,
+                        metavar=('T1MIN', 'T1MAX', 'T2MIN', 'T2MAX', 'T3MIN', 'T3MAX'))
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--results-dir', default=None)
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.grid is not None:
+        candidates = grid_candidates(args.grid)
+    else:
+        candidates = random_candidates(args.random, seed=args.seed)
+    limits = None if args.limits is None else np.reshape(args.limits, (3, 2))
+
+    try:
+        results = sweep(candidates, load_points(args.targets), limits, args.workers,
+                        args.chunk_size, args.results_dir)
+    except (OSError, ValueError) as e:
+        print(f"Błąd: {e}", file=sys.stderr)
+        return 1
+
+    print(f"{'L1':>6} {'L2':>6} {'L3':>6} {'osiąg.':>8} {'objętość':>10} {'manip.':>8}")
+    for row in results[:args.top]:
+        print(f"{row['L1']:6.3f} {row['L2']:6.3f} {row['L3']:6.3f} {row['reachable_fraction']:8.3f} "
+              f"{row['workspace_volume']:10.3f} {row['manipulability']:8.3f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
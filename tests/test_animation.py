@@ -0,0 +1,101 @@
+import types
+from collections import deque
+
+import numpy as np
+
+from rrr import AnimationClock, RobotGUI, TrailBuffer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_clock_skips_frames_instead_of_lagging():
+    clock = FakeClock()
+    playback = AnimationClock(101, rate=20.0, tick_rate=20.0, clock=clock)
+    playback.start()
+    assert playback.next_frame() == 0
+    # Rysowanie trwało 3 takty - odtwarzanie przeskakuje do właściwej próbki
+    clock.now = 0.15
+    assert playback.next_frame() == 3
+    assert playback.dropped == 2
+    assert playback.next_frame() is None
+
+
+def test_pause_seek_and_speed():
+    clock = FakeClock()
+    playback = AnimationClock(101, rate=10.0, clock=clock)
+    playback.start()
+    clock.now = 1.0
+    playback.pause()
+    clock.now = 5.0
+    assert playback.frame() == 10
+
+    playback.seek(50)
+    assert playback.frame() == 50 and playback.paused
+    playback.set_speed(2.0)
+    playback.start()
+    clock.now = 6.0
+    assert playback.frame() == 70
+
+    clock.now = 100.0
+    assert playback.next_frame() == 100
+    assert playback.finished
+
+
+class FakeTimer:
+    def stop(self):
+        pass
+
+
+def test_stop_pauses_playback_clock():
+    clock = FakeClock()
+    gui = types.SimpleNamespace(trajectory=[None] * 101, animation=FakeTimer(), updating_seek=False,
+                                playback=AnimationClock(101, rate=10.0, clock=clock))
+    gui.start_timer = lambda: setattr(gui, 'animation', FakeTimer())
+    gui.stop_animation = lambda: RobotGUI.stop_animation(gui)
+    gui.playback.start()
+    clock.now = 2.0
+    gui.stop_animation()
+    assert gui.animation is None and gui.playback.paused
+
+    # Wznowienie po długiej przerwie zaczyna od miejsca zatrzymania
+    clock.now = 60.0
+    RobotGUI.toggle_pause(gui)
+    assert gui.playback.frame() == 20
+    clock.now = 61.0
+    assert gui.playback.frame() == 30
+
+
+def test_ring_trail_keeps_last_points_in_order():
+    points = np.arange(3 * 40, dtype=float).reshape(-1, 3)
+    trail = TrailBuffer(7, ring=True)
+    expected = deque(maxlen=7)
+    # Pojedyncze punkty, paczki krótsze i dłuższe niż pojemność - wielokrotne zawinięcie
+    for start, stop in [(0, 3), (3, 4), (4, 9), (9, 10), (10, 25), (25, 26), (26, 31), (31, 40)]:
+        if stop - start == 1:
+            trail.append(points[start])
+        else:
+            trail.extend(points[start:stop])
+        expected.extend(points[start:stop])
+        np.testing.assert_array_equal(trail.view(), np.array(expected))
+        assert len(trail) == len(expected)
+    # Widok bez kopiowania
+    assert np.shares_memory(trail.view(), trail.buffer)
+
+    trail.clear()
+    trail.append(points[0])
+    np.testing.assert_array_equal(trail.view(), points[:1])
+
+
+def test_unbounded_trail_grows():
+    points = np.random.default_rng(0).uniform(-1, 1, (100, 3))
+    trail = TrailBuffer(4)
+    for point in points[:10]:
+        trail.append(point)
+    trail.extend(points[10:])
+    np.testing.assert_array_equal(trail.view(), points)
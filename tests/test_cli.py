@@ -0,0 +1,37 @@
+import numpy as np
+
+from cli import count_rows, run
+from rrr import RobotRRR
+
+ANGLES = np.array([[0.0, 0.0, 0.0], [30.0, 45.0, -60.0], [-90.0, 10.0, 120.0],
+                   [170.0, -20.0, 35.0]])
+
+
+def write_csv(path):
+    lines = ['theta1,theta2,theta3', '# kąty w stopniach', '']
+    for i, row in enumerate(ANGLES):
+        line = ','.join(f'{value:g}' for value in row)
+        lines.append(f'{line}  # wiersz {i}' if i == 1 else line)
+        lines.append('# komentarz')
+    path.write_text('\n'.join(lines) + '\n')
+    return str(path)
+
+
+def test_count_rows_skips_comments_like_the_parser(tmp_path):
+    assert count_rows(write_csv(tmp_path / 'angles.csv')) == len(ANGLES)
+
+
+def test_fk_to_npy_with_comment_lines(tmp_path):
+    output = str(tmp_path / 'positions.npy')
+    run('fk', write_csv(tmp_path / 'angles.csv'), output, chunk_size=2)
+    _, expected = RobotRRR().forward_kinematics_batch(ANGLES)
+    np.testing.assert_allclose(np.load(output), expected, atol=1e-9)
+
+
+def test_csv_and_npy_outputs_agree(tmp_path):
+    source = str(tmp_path / 'angles.npy')
+    np.save(source, ANGLES)
+    run('fk', source, str(tmp_path / 'positions.npy'), all_joints=True)
+    run('fk', source, str(tmp_path / 'positions.csv'), all_joints=True)
+    from_csv = np.loadtxt(tmp_path / 'positions.csv', delimiter=',', skiprows=1)
+    np.testing.assert_allclose(from_csv, np.load(tmp_path / 'positions.npy'), atol=1e-9)
@@ -0,0 +1,60 @@
+import numpy as np
+
+from collision import Scene, segment_box_distance, segment_segment_distance
+from rrr import RobotRRR
+
+
+def random_scene(seed=0, count=300):
+    rng = np.random.default_rng(seed)
+    scene = Scene(link_radius=0.05)
+    scene.add_sphere(rng.uniform(-2, 2, (count, 3)) + [0, 0, 1], rng.uniform(0.02, 0.1, count))
+    start = rng.uniform(-2, 2, (count, 3)) + [0, 0, 1]
+    scene.add_capsule(start, start + rng.uniform(-0.2, 0.2, (count, 3)), rng.uniform(0.02, 0.05, count))
+    lower = rng.uniform(-2, 2, (count, 3)) + [0, 0, 1]
+    scene.add_box(lower, lower + rng.uniform(0.02, 0.2, (count, 3)))
+    return scene
+
+
+def test_grid_matches_brute_force():
+    scene = random_scene()
+    robot = RobotRRR(1.0, 1.0, 1.0)
+    positions = robot.generate_trajectory([-170, 10, 20], [170, 80, -120], steps=200)
+    margin = 0.05
+
+    grid = scene.check(positions, margin=margin)
+    brute = scene.check(positions, margin=np.inf)
+    assert brute.colliding.any() and not brute.colliding.all()
+    np.testing.assert_array_equal(grid.colliding, brute.colliding)
+    assert grid.first == brute.first
+    # Poniżej margin prześwit jest dokładny, powyżej tylko ograniczony z dołu
+    near = brute.clearance <= margin
+    np.testing.assert_allclose(grid.clearance[near], brute.clearance[near], atol=1e-9)
+    assert np.all(grid.clearance[~near] > margin)
+
+
+def test_segment_distances_against_sampling():
+    rng = np.random.default_rng(1)
+    p1, q1, p2, q2 = rng.uniform(-1, 1, (4, 500, 3))
+    t = np.linspace(0, 1, 201)
+    a = p1[:, None, None] + t[:, None, None] * (q1 - p1)[:, None, None]
+    b = p2[:, None, None] + t[None, :, None] * (q2 - p2)[:, None, None]
+    sampled = np.linalg.norm(a - b, axis=-1).min(axis=(1, 2))
+    exact = segment_segment_distance(p1, q1, p2, q2)
+    assert np.all(exact <= sampled + 1e-12)
+    assert np.all(sampled - exact < 1e-2)
+
+    lo = rng.uniform(-1, 0, (500, 3))
+    hi = lo + rng.uniform(0.1, 0.5, (500, 3))
+    points = p1[:, None] + t[None, :, None] * (q1 - p1)[:, None]
+    sampled = np.linalg.norm(points - np.clip(points, lo[:, None], hi[:, None]), axis=-1).min(axis=1)
+    exact = segment_box_distance(p1, q1, lo, hi)
+    assert np.all(exact <= sampled + 1e-9)
+    assert np.all(sampled - exact < 1e-2)
+
+
+def test_floor_and_trajectory_rejection():
+    robot = RobotRRR(1.0, 1.0, 1.0)
+    scene = Scene(link_radius=0.05)
+    # Ramię skierowane w dół przebija podłoże
+    assert robot.generate_trajectory([0, 0, 0], [0, -80, 0], steps=20, scene=scene) is None
+    assert robot.generate_trajectory([0, 0, 0], [0, 45, 0], steps=20, scene=scene) is not None
@@ -0,0 +1,49 @@
+import numpy as np
+
+from cspace_index import ConfigurationIndex
+from rrr import RobotRRR, within_limits
+
+LIMITS = [[-90, 90], [0, 120], [-150, 0]]
+
+
+def test_query_matches_brute_force():
+    index = ConfigurationIndex(RobotRRR(1.0, 1.2, 0.8), resolution=20)
+    # Punkty w zasięgu, poza nim i daleko od ramienia
+    targets = np.random.default_rng(0).uniform(-4, 4, (600, 3))
+    result = index.query(targets, LIMITS, chunk_size=100)
+
+    distances = np.linalg.norm(index.effector[None] - targets[:, None], axis=2)
+    np.testing.assert_allclose(result.distance, distances.min(axis=1), atol=1e-12)
+    np.testing.assert_allclose(np.linalg.norm(result.effector - targets, axis=1), result.distance,
+                               atol=1e-12)
+    assert within_limits(result.angles, LIMITS).all()
+
+
+def test_refine_reaches_targets_within_limits():
+    robot = RobotRRR(1.0, 1.2, 0.8)
+    angles = np.random.default_rng(1).uniform(*np.transpose(LIMITS), (200, 3))
+    _, targets = robot.forward_kinematics_batch(angles)
+
+    index = ConfigurationIndex(robot, resolution=16)
+    result = index.query(targets, LIMITS, refine=True)
+    assert within_limits(result.angles, LIMITS).all()
+    # Rzutowanie na ograniczenia może zatrzymać nieliczne punkty w minimum lokalnym
+    assert np.mean(result.distance < 1e-6) > 0.9
+    _, reached = robot.forward_kinematics_batch(result.angles)
+    np.testing.assert_allclose(np.linalg.norm(reached - targets, axis=1), result.distance, atol=1e-12)
+
+
+def test_index_rebuilds_only_when_inputs_change():
+    robot = RobotRRR(1.0, 1.0, 1.0)
+    index = ConfigurationIndex(robot, resolution=12)
+    index.nearest(1.0, 0.5, 1.0, LIMITS)
+    index.nearest(0.5, 0.5, 1.5, LIMITS)
+    assert index.builds == 1
+
+    robot.L3 = 1.5
+    index.nearest(1.0, 0.5, 1.0, LIMITS)
+    index.nearest(1.0, 0.5, 1.0, [[-180, 180]] * 3)
+    assert index.builds == 3
+    index.resolution = 10
+    index.nearest(1.0, 0.5, 1.0, [[-180, 180]] * 3)
+    assert index.builds == 4
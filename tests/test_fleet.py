@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from fleet import Fleet
+from rrr import RobotRRR
+
+LENGTHS = [[1.0, 1.2, 0.8], [0.5, 1.0, 1.5], [2.0, 0.7, 0.9]]
+
+
+def test_removed_slots_are_reused_lowest_first():
+    fleet = Fleet(capacity=8)
+    slots = fleet.add_many([[1.0, 1.0, 1.0]] * 6)
+    np.testing.assert_array_equal(slots, np.arange(6))
+
+    fleet.remove([4, 1])
+    fleet.remove(fleet.arm(3))
+    np.testing.assert_array_equal(fleet.add_many([[1.0, 1.0, 1.0]] * 2), [1, 3])
+    assert fleet.add().slot == 4
+    assert fleet.add().slot == 6
+    with pytest.raises(ValueError):
+        fleet.remove(7)
+
+
+def test_duplicate_remove_frees_slot_once():
+    fleet = Fleet(capacity=4)
+    fleet.add_many([[1.0, 1.0, 1.0]] * 4)
+    fleet.remove([1, 1])
+    assert len(fleet) == 3 and len(fleet.free) == 1
+    slots = fleet.add_many([[1.0, 1.0, 1.0]] * 2)
+    assert slots[0] == 1 and len(set(fleet.slots.tolist())) == len(fleet) == 5
+
+
+def test_growth_keeps_arms_and_hands_out_new_slots_in_order():
+    fleet = Fleet(capacity=2, dtype=np.float64)
+    fleet.add_many(LENGTHS[:2], angles=[[10, 20, 30], [40, 50, 60]])
+    slots = fleet.add_many(LENGTHS * 2)
+    assert fleet.capacity >= 8
+    np.testing.assert_array_equal(slots, np.arange(2, 8))
+    np.testing.assert_array_equal(fleet.angles[:2], [[10, 20, 30], [40, 50, 60]])
+    np.testing.assert_array_equal(fleet.limits[slots], [[[-180, 180]] * 3] * len(slots))
+
+
+def test_kinematics_match_single_robots():
+    fleet = Fleet(dtype=np.float64)
+    angles = np.random.default_rng(0).uniform(-90, 90, (len(LENGTHS), 3))
+    fleet.add_many(LENGTHS, angles)
+    positions, effector = fleet.forward_kinematics()
+    for i, lengths in enumerate(LENGTHS):
+        robot_positions, _ = RobotRRR(*lengths).forward_kinematics_batch(angles[i:i + 1])
+        np.testing.assert_allclose(positions[i], robot_positions[0], atol=1e-12)
+
+    solutions, reachable, _ = fleet.inverse_kinematics(effector)
+    assert reachable.all()
+    for i, lengths in enumerate(LENGTHS):
+        expected, _ = RobotRRR(*lengths).inverse_kinematics_batch(effector[i:i + 1])
+        np.testing.assert_allclose(solutions[i], expected[0], atol=1e-9)
+
+
+def test_step_finishes_moves_at_goal():
+    fleet = Fleet()
+    fleet.add_many(LENGTHS)
+    goals = np.array([[30, 40, -50], [10, 0, 0], [-90, 45, 90]])
+    fleet.move_to(goals, duration=[1.0, 0.5, 0.25])
+    finished = []
+    while len(fleet.moving()):
+        finished.extend(fleet.step(0.1).tolist())
+    assert finished == [2, 1, 0]
+    np.testing.assert_allclose(fleet.angles[:3], goals, atol=1e-5)
+
+
+def test_arm_view_writes_through():
+    fleet = Fleet()
+    arm = fleet.add(1.0, 1.2, 0.8, angles=[10, 20, 30])
+    arm.L2 = 1.5
+    assert fleet.lengths[arm.slot, 1] == 1.5
+    arm.angles = [0, 45, -45]
+    np.testing.assert_allclose(fleet.angles[arm.slot], [0, 45, -45])
+    _, effector = RobotRRR(1.0, 1.5, 0.8).forward_kinematics_batch([[0, 45, -45]])
+    np.testing.assert_allclose(arm.forward_kinematics_batch([arm.angles])[1], effector, atol=1e-6)
+
+
+def test_float32_ik_uses_shared_closed_form():
+    rng = np.random.default_rng(1)
+    lengths = rng.uniform(0.5, 1.5, (2000, 3))
+    angles = rng.uniform(-180, 180, (2000, 3))
+    reference = Fleet(dtype=np.float64)
+    reference.add_many(lengths, angles)
+    _, targets = reference.forward_kinematics()
+
+    fleet = Fleet()
+    fleet.add_many(lengths, angles)
+    solutions, reachable, _ = fleet.inverse_kinematics(targets)
+    assert solutions.dtype == np.float32 and reachable.all()
+    for branch in range(2):
+        _, reached = reference.forward_kinematics(angles=solutions[:, branch].astype(float))
+        assert np.linalg.norm(reached - targets, axis=1).max() < 1e-6
@@ -0,0 +1,235 @@
+import itertools
+
+import numpy as np
+
+from rrr import ELBOW_DOWN, ELBOW_UP, IKCache, RobotRRR, within_limits
+
+
+def random_angles(count, seed=0):
+    return np.random.default_rng(seed).uniform(-180, 180, (count, 3))
+
+
+def test_jacobian_matches_finite_differences():
+    for lengths in [(1.0, 1.0, 1.0), (0.5, 1.2, 0.8), (2.0, 0.3, 1.7)]:
+        robot = RobotRRR(*lengths)
+        assert robot.jacobian_error(random_angles(500)).max() < 1e-6
+
+
+def test_jacobian_determinant_matches_batch_jacobian():
+    robot = RobotRRR(1.0, 1.2, 0.8)
+    angles = random_angles(200, seed=1)
+    np.testing.assert_allclose(robot.jacobian_determinant(angles),
+                               np.linalg.det(robot.jacobian_batch(angles)), atol=1e-12)
+
+
+def test_out_buffers_match_allocating_calls():
+    robot = RobotRRR(1.0, 1.2, 0.8)
+    angles = random_angles(1000, seed=2)
+    positions, effector = robot.forward_kinematics_batch(angles)
+    out = np.empty((len(angles), 4, 3))
+    np.testing.assert_array_equal(robot.forward_kinematics_batch(angles, out=out)[0], positions)
+
+    solutions, reachable = robot.inverse_kinematics_batch(effector)
+    buffers = np.empty((len(angles), 2, 3)), np.empty(len(angles), dtype=bool)
+    robot.inverse_kinematics_batch(effector, out=buffers)
+    np.testing.assert_array_equal(buffers[0], solutions)
+    np.testing.assert_array_equal(buffers[1], reachable)
+
+
+def test_out_path_does_not_allocate_per_row():
+    import tracemalloc
+
+    robot = RobotRRR(1.0, 1.2, 0.8)
+    targets = np.random.default_rng(3).uniform(-2, 2, (5000, 3))
+    buffers = np.empty((len(targets), 2, 3)), np.empty(len(targets), dtype=bool)
+    robot.inverse_kinematics_batch(targets, out=buffers)
+    tracemalloc.start()
+    robot.inverse_kinematics_batch(targets, out=buffers)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert peak < 8 * 1024
+
+
+def test_float32_ik_accuracy_near_elbow_singularities():
+    robot = RobotRRR(1.0, 1.0, 1.0)
+    rng = np.random.default_rng(4)
+    angles = random_angles(20000, seed=5)
+    # Łokieć prawie złożony (theta3 ~ ±180°) i prawie wyprostowany (theta3 ~ 0°)
+    angles[:5000, 2] = rng.uniform(178, 180, 5000) * rng.choice([-1, 1], 5000)
+    angles[5000:10000, 2] = rng.uniform(-2, 2, 5000)
+    _, effector = robot.forward_kinematics_batch(angles)
+
+    solutions, reachable = robot.inverse_kinematics_batch(effector, dtype=np.float32)
+    assert solutions.dtype == np.float32
+    _, reached = robot.forward_kinematics_batch(solutions.reshape(-1, 3).astype(float))
+    error = np.linalg.norm(reached.reshape(-1, 2, 3) - effector[:, None], axis=2)[reachable]
+    assert error.max() < 1e-6 * 3
+
+
+def test_planner_respects_limits_and_endpoints():
+    from rrr import plan_joint_trajectory
+
+    waypoints = [[0, 0, 0], [60, 30, -45], [65, 35, -40], [-90, 120, 100], [-90, 120, 100]]
+    max_velocity, max_acceleration = np.array([90.0, 60.0, 120.0]), 200.0
+    rate = 200.0
+    motion = plan_joint_trajectory(waypoints, max_velocity, max_acceleration, rate=rate)
+
+    np.testing.assert_allclose(motion.angles[0], waypoints[0], atol=1e-9)
+    np.testing.assert_allclose(motion.angles[-1], waypoints[-1], atol=1e-9)
+    np.testing.assert_allclose(motion.velocities[[0, -1]], 0.0, atol=1e-9)
+    assert len(motion.times) == int(np.ceil(motion.times[-1] * rate - 1e-9)) + 1
+    assert np.all(np.diff(motion.times) > 0)
+
+    assert np.all(np.abs(motion.velocities) <= max_velocity + 1e-9)
+    assert np.all(np.abs(motion.accelerations) <= max_acceleration + 1e-9)
+    # Różnice skończone próbek też mieszczą się w ograniczeniach
+    finite = np.diff(motion.angles, axis=0) / np.diff(motion.times)[:, None]
+    assert np.all(np.abs(finite) <= max_velocity + 1e-6)
+
+
+def collect_path(robot, waypoints, **options):
+    chunks = list(robot.cartesian_path(waypoints, **options))
+    return (chunks, np.concatenate([chunk.points for chunk in chunks]),
+            np.concatenate([chunk.angles for chunk in chunks]))
+
+
+def test_cartesian_path_is_straight_and_continuous():
+    robot = RobotRRR(1.0, 1.2, 0.8)
+    # Łuk wokół podstawy przez theta1 = ±180° wymaga rozwinięcia kątów między fragmentami
+    waypoints = [[-1.2, -0.6, 1.0], [-1.2, 0.6, 1.0], [-0.4, 0.6, 1.5]]
+    chunks, points, angles = collect_path(robot, waypoints, step=0.005, chunk_size=50)
+    assert len(chunks) > 3 and all(chunk.ok for chunk in chunks)
+
+    _, effector = robot.forward_kinematics_batch(angles)
+    np.testing.assert_allclose(effector, points, atol=1e-9)
+    np.testing.assert_allclose(points[[0, -1]], np.array(waypoints)[[0, -1]], atol=1e-12)
+    # Każdy punkt leży na jednym z odcinków łamanej
+    a, b = np.array(waypoints[:-1]), np.array(waypoints[1:])
+    u = np.clip(np.einsum('ijk,jk->ij', points[:, None] - a, b - a) / np.sum((b - a)**2, axis=1), 0, 1)
+    distance = np.linalg.norm(points[:, None] - (a + u[..., None] * (b - a)), axis=2).min(axis=1)
+    assert distance.max() < 1e-12
+    assert np.abs(np.diff(angles, axis=0)).max() < 5.0
+
+
+def test_cartesian_path_wraps_into_limits():
+    robot = RobotRRR()
+    limits = [[0, 360], [-180, 180], [-180, 180]]
+    chunks, _, angles = collect_path(robot, [[-1.2, -0.3, 1.0], [-1.2, 0.3, 1.0]], limits=limits,
+                                     chunk_size=16)
+    assert all(chunk.ok for chunk in chunks)
+    assert within_limits(angles, limits).all()
+    assert np.abs(np.diff(angles, axis=0)).max() < 5.0
+
+    # Start z konfiguracji odniesienia: wybrana rodzina i przesunięcie jak w IK nearest
+    seed = [170.0, 50.0, -100.0]
+    chunks, _, angles = collect_path(robot, [[-1.2, 0.3, 1.0], [-1.2, -0.3, 1.0]], limits=limits,
+                                     start_angles=seed)
+    expected = robot.inverse_kinematics_nearest(-1.2, 0.3, 1.0, seed, limits)
+    np.testing.assert_allclose(angles[0], expected, atol=1e-9)
+    assert within_limits(angles, limits).all()
+
+
+def test_cartesian_path_unwraps_partly_reachable_chunks():
+    robot = RobotRRR(1.0, 1.0, 1.0)
+    # Odcinek przechodzi przez theta1 = ±180°, a potem wychodzi poza zasięg (y > 0.87),
+    # więc jedyny fragment jest osiągalny tylko częściowo
+    waypoints = [[-1.8, -0.5, 1.0], [-1.8, 1.2, 1.0]]
+    chunks, _, angles = collect_path(robot, waypoints, chunk_size=200)
+    assert len(chunks) == 1 and not chunks[0].ok
+    reachable = chunks[0].reachable
+    assert reachable.any() and np.isnan(angles[~reachable]).all()
+    assert angles[reachable, 0].min() < -180
+    assert np.abs(np.diff(angles[reachable], axis=0)).max() < 30.0
+
+    _, _, small = collect_path(robot, waypoints, chunk_size=16)
+    np.testing.assert_allclose(small, angles, atol=1e-9)
+
+
+def test_scalar_ik_matches_batch():
+    robot = RobotRRR(1.0, 1.2, 0.8)
+    targets = np.random.default_rng(6).uniform(-2.5, 2.5, (2000, 3))
+    solutions, reachable = robot.inverse_kinematics_batch(targets)
+    limits = [[-90, 90], [-180, 180], [0, 180]]
+    for i, target in enumerate(targets):
+        for elbow_up, branch in [(True, ELBOW_UP), (False, ELBOW_DOWN)]:
+            angles = robot.inverse_kinematics(*target, elbow_up=elbow_up)
+            assert (angles is not None) == reachable[i]
+            if angles is None:
+                continue
+            np.testing.assert_allclose(angles, solutions[i, branch], atol=1e-9)
+            limited = robot.inverse_kinematics(*target, elbow_up=elbow_up, limits=limits)
+            assert (limited is not None) == within_limits(solutions[i, branch], limits)
+
+
+def test_nearest_ik_matches_brute_force_over_families_and_wraps():
+    robot = RobotRRR(1.0, 1.2, 0.8)
+    rng = np.random.default_rng(7)
+    targets = robot.forward_kinematics_batch(random_angles(300, seed=8))[1]
+    seeds = rng.uniform(-360, 360, (300, 3))
+    weights = np.array([1.0, 2.0, 0.5])
+    limits = [[0, 360], [-90, 270], [-200, 100]]
+    angles, found = robot.inverse_kinematics_nearest_batch(targets, seeds, limits, weights)
+
+    # Rodziny: dwie gałęzie łokcia i ich odbicia (theta1 + 180°, 180° - theta2, -theta3)
+    solutions, _ = robot.inverse_kinematics_batch(targets)
+    mirrored = np.stack([solutions[..., 0] + 180, 180 - solutions[..., 1], -solutions[..., 2]], -1)
+    families = np.concatenate([solutions, mirrored], axis=1)
+    shifts = np.array(list(itertools.product([-720, -360, 0, 360, 720], repeat=3)))
+    for i in range(len(targets)):
+        candidates = (families[i][:, None] + shifts).reshape(-1, 3)
+        candidates = candidates[within_limits(candidates, limits)]
+        assert found[i] == (len(candidates) > 0)
+        if not found[i]:
+            continue
+        cost = (((candidates - seeds[i])**2) * weights).sum(axis=1)
+        assert np.isclose(((angles[i] - seeds[i])**2 * weights).sum(), cost.min(), atol=1e-9)
+        assert within_limits(angles[i], limits)
+        _, reached = robot.forward_kinematics_batch(angles[i:i + 1])
+        np.testing.assert_allclose(reached[0], targets[i], atol=1e-9)
+    assert found.mean() > 0.5
+
+
+def test_ik_cache_quantizes_targets():
+    cache = IKCache(tolerance=1e-3)
+    robot = RobotRRR(1.0, 1.2, 0.8, ik_cache=cache)
+    first = robot.inverse_kinematics(1.0, 0.5, 1.2)
+    # Ten sam punkt siatki (różnica poniżej tolerance/2) - wynik z pamięci
+    assert robot.inverse_kinematics(1.0 + 2e-4, 0.5, 1.2) == first
+    assert (cache.hits, cache.misses) == (1, 1)
+    # Inna komórka, inna gałąź łokcia albo inne ograniczenia - nowe obliczenie
+    robot.inverse_kinematics(1.0 + 2e-3, 0.5, 1.2)
+    robot.inverse_kinematics(1.0, 0.5, 1.2, elbow_up=True)
+    robot.inverse_kinematics(1.0, 0.5, 1.2, limits=[[-90, 90], [0, 180], [0, 180]])
+    assert (cache.hits, cache.misses) == (1, 4)
+    # Wynik None (punkt nieosiągalny) też jest zapamiętywany
+    assert robot.inverse_kinematics(10.0, 0.0, 0.0) is None
+    assert robot.inverse_kinematics(10.0, 0.0, 0.0) is None
+    assert (cache.hits, cache.misses) == (2, 5)
+
+
+def test_ik_cache_evicts_least_recently_used():
+    cache = IKCache(maxsize=2)
+    robot = RobotRRR(ik_cache=cache)
+    robot.inverse_kinematics(1.0, 0.0, 1.0)
+    robot.inverse_kinematics(0.0, 1.0, 1.0)
+    robot.inverse_kinematics(1.0, 0.0, 1.0)  # odświeża pierwszy wpis
+    robot.inverse_kinematics(0.5, 0.5, 1.0)  # usuwa drugi
+    assert len(cache) == 2 and cache.evictions == 1
+    hits = cache.hits
+    robot.inverse_kinematics(1.0, 0.0, 1.0)
+    assert cache.hits == hits + 1
+    robot.inverse_kinematics(0.0, 1.0, 1.0)
+    assert cache.hits == hits + 1 and cache.evictions == 2
+
+
+def test_ik_cache_invalidated_when_lengths_change():
+    cache = IKCache()
+    robot = RobotRRR(1.0, 1.0, 1.0, ik_cache=cache)
+    before = robot.inverse_kinematics(1.0, 0.5, 1.5)
+    robot.L2 = 1.0  # bez zmiany wartości - wpisy zostają
+    assert len(cache) == 1 and cache.invalidations == 0
+    robot.L2 = 1.3
+    assert len(cache) == 0 and cache.invalidations == 1
+    after = robot.inverse_kinematics(1.0, 0.5, 1.5)
+    assert after != before
+    assert after == RobotRRR(1.0, 1.3, 1.0).inverse_kinematics(1.0, 0.5, 1.5)
@@ -0,0 +1,69 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from rrr import RobotRRR
+from service import OP_FK, KinematicsClient, KinematicsService
+
+
+class BrokenRobot(RobotRRR):
+    # Poprawna ramka, ale obliczenia kończą się błędem innym niż ValueError
+    def forward_kinematics_batch(self, *args, **kwargs):
+        raise IndexError("uszkodzony model")
+
+
+async def exchange():
+    robot = RobotRRR(1.0, 1.2, 0.8)
+    service = KinematicsService({'arm': robot, 'broken': BrokenRobot()}, max_pending=4)
+    await service.start(port=0)
+    client = await KinematicsClient.connect(port=service.address[1])
+    try:
+        angles = np.random.default_rng(0).uniform(-90, 90, (20, 3))
+        _, targets = robot.forward_kinematics_batch(angles)
+        requests = [client.fk('arm', angles[i:i + 2]) for i in range(0, len(angles), 2)]
+        requests += [client.ik('arm', targets, elbow='up'),
+                     client.request(OP_FK, 0, 'arm', b'\x00' * 25),
+                     client.fk('broken', angles),
+                     client.fk('missing', angles)]
+        # Więcej żądań niż max_pending - błędy nie mogą zatrzymać zwalniania miejsc
+        requests += [client.fk('broken', angles) for _ in range(8)]
+        results = await asyncio.wait_for(asyncio.gather(*requests, return_exceptions=True), 5)
+        return robot, angles, targets, results, service.pending
+    finally:
+        await client.close()
+        await service.close()
+
+
+def test_every_request_gets_a_response():
+    robot, angles, targets, results, pending = asyncio.run(exchange())
+    assert pending == 0
+
+    positions = np.concatenate(results[:10])
+    np.testing.assert_allclose(positions, robot.forward_kinematics_batch(angles)[0], atol=1e-12)
+
+    solutions, ok = results[10]
+    assert ok.all()
+    _, reached = robot.forward_kinematics_batch(solutions)
+    np.testing.assert_allclose(reached, targets, atol=1e-9)
+
+    errors = results[11:]
+    assert all(isinstance(error, ValueError) for error in errors)
+    assert 'uszkodzony model' in str(errors[1])
+    assert 'missing' in str(errors[2])
+
+
+def test_client_rejects_unknown_profile():
+    async def request():
+        service = KinematicsService({'arm': RobotRRR()})
+        await service.start(port=0)
+        client = await KinematicsClient.connect(port=service.address[1])
+        try:
+            with pytest.raises(ValueError):
+                await client.trajectory('arm', [0, 0, 0], [10, 10, 10], profile='nieznany')
+            return await client.trajectory('arm', [0, 0, 0], [10, 10, 10], steps=5)
+        finally:
+            await client.close()
+            await service.close()
+
+    assert asyncio.run(request()).shape == (5, 4, 3)
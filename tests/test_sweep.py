@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from sweep import MANIFEST_NAME, grid_candidates, sweep
+
+LIMITS = [[-90, 90], [0, 180], [-150, 150]]
+
+
+@pytest.fixture
+def targets():
+    return np.random.default_rng(0).uniform(-1.5, 1.5, (200, 3)) + [0.0, 0.0, 1.0]
+
+
+def test_resume_reuses_chunks(tmp_path, targets):
+    candidates = grid_candidates(3)
+    first = sweep(candidates, targets, LIMITS, workers=1, chunk_size=10, results_dir=tmp_path)
+    assert (tmp_path / MANIFEST_NAME).exists()
+    assert len(first) == len(candidates)
+
+    resumed = sweep(candidates, targets, LIMITS, workers=1, chunk_size=10, results_dir=tmp_path)
+    np.testing.assert_array_equal(resumed, first)
+
+
+@pytest.mark.parametrize('change', ['candidates', 'targets', 'limits', 'chunk_size'])
+def test_resume_with_other_inputs_is_rejected(tmp_path, targets, change):
+    candidates = grid_candidates(3)
+    sweep(candidates, targets, LIMITS, workers=1, chunk_size=10, results_dir=tmp_path)
+
+    args = {'candidates': candidates, 'targets': targets, 'limits': LIMITS, 'chunk_size': 10}
+    args[change] = {
+        'candidates': grid_candidates(3, low=0.5),
+        'targets': targets + 0.1,
+        'limits': [[-45, 45], [0, 180], [-150, 150]],
+        'chunk_size': 7,
+    }[change]
+    with pytest.raises(ValueError):
+        sweep(args['candidates'], args['targets'], args['limits'], workers=1,
+              chunk_size=args['chunk_size'], results_dir=tmp_path)
+
+
+def test_chunks_without_manifest_are_rejected(tmp_path, targets):
+    candidates = grid_candidates(2)
+    sweep(candidates, targets, workers=1, chunk_size=4, results_dir=tmp_path)
+    (tmp_path / MANIFEST_NAME).unlink()
+    with pytest.raises(ValueError):
+        sweep(candidates, targets, workers=1, chunk_size=4, results_dir=tmp_path)
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from rrr import RobotRRR, plan_joint_trajectory
+from trajfile import TrajectoryReader, TrajectoryWriter, save_trajectory
+
+LIMITS = [[-90, 90], [0, 180], [-150, 150]]
+
+
+def test_round_trip_keeps_planner_times(tmp_path):
+    robot = RobotRRR(1.0, 1.2, 0.8)
+    motion = plan_joint_trajectory([[0, 0, 0], [40, 20, -30]], rate=20.0)
+    positions, _ = robot.forward_kinematics_batch(motion.angles)
+    path = str(tmp_path / 'motion.rrrt')
+    save_trajectory(path, motion.times, motion.angles, (robot.L1, robot.L2, robot.L3), LIMITS,
+                    positions=positions)
+
+    reader = TrajectoryReader(path)
+    assert len(reader) == len(motion.times)
+    assert reader.lengths == (1.0, 1.2, 0.8)
+    np.testing.assert_array_equal(reader.limits, LIMITS)
+    np.testing.assert_array_equal(reader.times, motion.times)
+    np.testing.assert_array_equal(reader.angles, motion.angles)
+    np.testing.assert_array_equal(reader.positions, positions)
+    # Ostatni odstęp planu jest krótszy niż 1 / rate
+    assert reader.times[-1] - reader.times[-2] < 1 / 20.0
+
+
+def test_streaming_writer_matches_single_write(tmp_path):
+    robot = RobotRRR()
+    angles = np.random.default_rng(0).uniform(-180, 180, (250, 3))
+    times = np.arange(len(angles)) * 0.01
+    path = str(tmp_path / 'stream.rrrt')
+    with TrajectoryWriter(path, (1.0, 1.0, 1.0)) as writer:
+        for start in range(0, len(angles), 64):
+            writer.append(times[start:start + 64], angles[start:start + 64])
+
+    reader = TrajectoryReader(path)
+    np.testing.assert_array_equal(reader.angles, angles)
+    np.testing.assert_allclose(reader.positions, robot.forward_kinematics_batch(angles)[0])
+    np.testing.assert_array_equal(reader[100]['time'], times[100])
+
+
+def test_rejects_foreign_file(tmp_path):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'\x00' * 256)
+    with pytest.raises(ValueError):
+        TrajectoryReader(str(path))
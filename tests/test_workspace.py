@@ -0,0 +1,41 @@
+import numpy as np
+
+from rrr import RobotRRR, wrapped_within_limits
+from workspace import WorkspaceCache, WorkspaceMap
+
+LIMITS = [[-90, 90], [0, 120], [-150, 0]]
+
+
+def test_save_load_round_trip(tmp_path):
+    workspace = WorkspaceMap.build(RobotRRR(1.0, 1.2, 0.8), LIMITS, resolution=24)
+    path = tmp_path / 'workspace.npz'
+    workspace.save(path)
+    loaded = WorkspaceMap.load(path)
+
+    np.testing.assert_array_equal(loaded.occupancy, workspace.occupancy)
+    np.testing.assert_array_equal(loaded.origin, workspace.origin)
+    assert loaded.voxel_size == workspace.voxel_size
+    assert loaded.lengths == workspace.lengths
+    np.testing.assert_array_equal(loaded.limits, workspace.limits)
+
+
+def test_occupied_voxels_are_reachable():
+    robot = RobotRRR(1.0, 1.2, 0.8)
+    workspace = WorkspaceMap.build(robot, LIMITS, resolution=24)
+    index = np.argwhere(workspace.occupancy)
+    centres = workspace.origin + (index + 0.5) * workspace.voxel_size
+    families, _ = robot.inverse_kinematics_families(centres)
+    assert wrapped_within_limits(families, LIMITS).any(axis=1).all()
+    np.testing.assert_array_equal(workspace.contains_batch(centres), True)
+
+    # Punkt daleko poza zasięgiem
+    assert not workspace.contains(10.0, 0.0, 0.0)
+
+
+def test_cache_reuses_maps_for_quantized_lengths():
+    cache = WorkspaceCache(maxsize=2, resolution=16)
+    robot = RobotRRR(1.0, 1.0, 1.0)
+    first = cache.get(robot, LIMITS)
+    robot.L2 = 1.001
+    assert cache.get(robot, LIMITS) is first
+    assert (cache.hits, cache.misses) == (1, 1)
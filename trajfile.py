@@ -0,0 +1,133 @@
+"""Binarny format zapisu trajektorii robota RRR.
+
+Plik składa się z nagłówka o stałym rozmiarze (HEADER_SIZE bajtów) i ciągu rekordów
+RECORD_DTYPE - po jednym na klatkę: czas [s], kąty przegubów [°] (3) oraz pozycje
+przegubów (4, 3). Nagłówek zawiera długości ogniw L1, L2, L3 i ograniczenia kątów.
+
+TrajectoryWriter dopisuje klatki fragmentami, bez trzymania całego przebiegu
+w pamięci. TrajectoryReader mapuje plik do pamięci (np.memmap), więc otwarcie nawet
+bardzo dużego pliku jest natychmiastowe, dostęp do dowolnej klatki kosztuje O(1),
+a times / angles / positions są widokami bez kopiowania danych.
+"""
+import os
+import struct
+
+import numpy as np
+
+from rrr import RobotRRR
+
+MAGIC = b'RRRTRAJ\x00'
+VERSION = 1
+
+# magic, wersja, rozmiar nagłówka, liczba klatek, L1, L2, L3, ograniczenia (3 x min, max)
+HEADER_FORMAT = '<8sIIQ3d6d'
+HEADER_SIZE = 128
+COUNT_OFFSET = 16
+
+RECORD_DTYPE = np.dtype([
+    ('time', '<f8'),
+    ('angles', '<f8', (3,)),
+    ('positions', '<f8', (4, 3)),
+])
+
+NO_LIMITS = [[-np.inf, np.inf], [-np.inf, np.inf], [-np.inf, np.inf]]
+
+
+def _pack_header(count, lengths, limits):
+    header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, HEADER_SIZE, count,
+                         *lengths, *np.asarray(limits, dtype=float).ravel())
+    return header.ljust(HEADER_SIZE, b'\0')
+
+
+class TrajectoryWriter:
+    def __init__(self, path, lengths, limits=None):
+        self.path = path
+        self.lengths = tuple(float(L) for L in lengths)
+        self.limits = NO_LIMITS if limits is None else limits
+        self.robot = RobotRRR(*self.lengths)
+        self.count = 0
+        self.file = open(path, 'wb')
+        self.file.write(_pack_header(0, self.lengths, self.limits))
+
+    def append(self, times, angles, positions=None):
+        # Dopisanie fragmentu klatek: times (n,), angles (n, 3) i opcjonalnie positions
+        # (n, 4, 3) - gdy ich brak, liczone są kinematyką prostą
+        angles = np.asarray(angles, dtype=float).reshape(-1, 3)
+        if positions is None:
+            positions, _ = self.robot.forward_kinematics_batch(angles)
+        records = np.empty(len(angles), dtype=RECORD_DTYPE)
+        records['time'] = times
+        records['angles'] = angles
+        records['positions'] = positions
+        records.tofile(self.file)
+        self.count += len(records)
+
+    def flush(self):
+        # Aktualizacja liczby klatek w nagłówku
+        self.file.flush()
+        self.file.seek(COUNT_OFFSET)
+        self.file.write(struct.pack('<Q', self.count))
+        self.file.seek(0, os.SEEK_END)
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class TrajectoryReader:
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE or header[:8] != MAGIC:
+            raise ValueError(f"{path}: to nie jest plik trajektorii RRR")
+        fields = struct.unpack_from(HEADER_FORMAT, header)
+        version, header_size = fields[1], fields[2]
+        if version != VERSION:
+            raise ValueError(f"{path}: nieobsługiwana wersja formatu {version}")
+        self.lengths = tuple(fields[4:7])
+        self.limits = np.array(fields[7:13]).reshape(3, 2)
+
+        # Liczba klatek z rozmiaru pliku - działa także dla przerwanego zapisu
+        count = (os.path.getsize(path) - header_size) // RECORD_DTYPE.itemsize
+        if count > 0:
+            self.records = np.memmap(path, dtype=RECORD_DTYPE, mode='r',
+                                     offset=header_size, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=RECORD_DTYPE)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        return self.records[index]
+
+    @property
+    def times(self):
+        return self.records['time']
+
+    @property
+    def angles(self):
+        return self.records['angles']
+
+    @property
+    def positions(self):
+        return self.records['positions']
+
+    def close(self):
+        # Zwolnienie mapowania (widoki pobrane wcześniej przestają być ważne po usunięciu)
+        self.records = np.zeros(0, dtype=RECORD_DTYPE)
+
+
+def save_trajectory(path, times, angles, lengths, limits=None, positions=None):
+    with TrajectoryWriter(path, lengths, limits) as writer:
+        writer.append(times, angles, positions)
@@ -0,0 +1,146 @@
+"""Mapa obszaru roboczego robota RRR.
+
+WorkspaceMap to wokselowa siatka zajętości: woksel jest zajęty, gdy jego środek
+jest osiągalny przez efektor przy zadanych długościach ogniw i ograniczeniach
+kątów. Dokładność zapytań jest więc ograniczona rozmiarem woksela.
+WorkspaceCache przechowuje ostatnio używane mapy (LRU) dla konfiguracji ogniw.
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+from rrr import RobotRRR, wrapped_within_limits
+
+DEFAULT_LIMITS = [[-180, 180], [-180, 180], [-180, 180]]
+
+
+class WorkspaceMap:
+    def __init__(self, occupancy, origin, voxel_size, lengths, limits):
+        self.occupancy = np.asarray(occupancy, dtype=bool)
+        self.origin = np.asarray(origin, dtype=float)
+        self.voxel_size = float(voxel_size)
+        self.lengths = tuple(float(L) for L in lengths)
+        self.limits = np.asarray(limits, dtype=float)
+
+    @classmethod
+    def build(cls, robot, limits=None, resolution=64, chunk_size=65536):
+        # Siatka resolution^3 wokseli obejmująca sferę zasięgu ramienia L2 + L3
+        if limits is None:
+            limits = DEFAULT_LIMITS
+        reach = robot.L2 + robot.L3
+        voxel_size = 2 * reach / resolution
+        origin = np.array([-reach, -reach, robot.L1 - reach])
+
+        axis = (np.arange(resolution) + 0.5) * voxel_size
+        gx, gy, gz = np.meshgrid(axis, axis, axis, indexing='ij')
+        centres = np.stack([gx.ravel(), gy.ravel(), gz.ravel()], axis=1) + origin
+
+        # Środek jest osiągalny, gdy dowolna rodzina rozwiązań IK (obie gałęzie, odbicia
+        # i przesunięcia o ±360°) spełnia ograniczenia; partie ograniczają pamięć
+        occupancy = np.empty(len(centres), dtype=bool)
+        for start in range(0, len(centres), chunk_size):
+            families, _ = robot.inverse_kinematics_families(centres[start:start + chunk_size])
+            occupancy[start:start + chunk_size] = wrapped_within_limits(families, limits).any(axis=1)
+
+        return cls(occupancy.reshape(resolution, resolution, resolution), origin, voxel_size,
+                   (robot.L1, robot.L2, robot.L3), limits)
+
+    @property
+    def resolution(self):
+        return self.occupancy.shape[0]
+
+    def contains(self, x, y, z):
+        # Zapytanie O(1) o pojedynczy punkt
+        i = int((x - self.origin[0]) // self.voxel_size)
+        j = int((y - self.origin[1]) // self.voxel_size)
+        k = int((z - self.origin[2]) // self.voxel_size)
+        n = self.resolution
+        if not (0 <= i < n and 0 <= j < n and 0 <= k < n):
+            return False
+        return bool(self.occupancy[i, j, k])
+
+    def contains_batch(self, points):
+        # points: tablica (M, 3); zwraca maskę (M,)
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        index = np.floor((points - self.origin) / self.voxel_size).astype(np.int64)
+        inside = np.all((index >= 0) & (index < self.resolution), axis=1)
+        result = np.zeros(len(points), dtype=bool)
+        i, j, k = index[inside].T
+        result[inside] = self.occupancy[i, j, k]
+        return result
+
+    def volume(self):
+        return self.occupancy.sum() * self.voxel_size**3
+
+    def boundary_points(self, max_points=None):
+        # Środki zajętych wokseli, które mają co najmniej jednego pustego sąsiada
+        padded = np.pad(self.occupancy, 1)
+        interior = (padded[:-2, 1:-1, 1:-1] & padded[2:, 1:-1, 1:-1] &
+                    padded[1:-1, :-2, 1:-1] & padded[1:-1, 2:, 1:-1] &
+                    padded[1:-1, 1:-1, :-2] & padded[1:-1, 1:-1, 2:])
+        index = np.argwhere(self.occupancy & ~interior)
+        if max_points is not None and len(index) > max_points:
+            index = index[::-(-len(index) // max_points)]
+        return self.origin + (index + 0.5) * self.voxel_size
+
+    def save(self, path):
+        np.savez_compressed(
+            path,
+            occupancy=np.packbits(self.occupancy, axis=None),
+            shape=self.occupancy.shape,
+            origin=self.origin,
+            voxel_size=self.voxel_size,
+            lengths=self.lengths,
+            limits=self.limits,
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            shape = tuple(data['shape'])
+            occupancy = np.unpackbits(data['occupancy'], count=int(np.prod(shape))).reshape(shape)
+            return cls(occupancy, data['origin'], data['voxel_size'], data['lengths'], data['limits'])
+
+
+class WorkspaceCache:
+    # Mapy dla ostatnio używanych konfiguracji. Długości ogniw są kwantowane do
+    # length_step, więc powrót suwaka w okolice poprzedniej wartości trafia w cache;
+    # mapa budowana jest dla skwantowanych długości.
+    def __init__(self, maxsize=8, resolution=64, length_step=0.01):
+        self.maxsize = maxsize
+        self.resolution = resolution
+        self.length_step = length_step
+        self.maps = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, lengths, limits, resolution):
+        lengths = tuple(int(round(L / self.length_step)) for L in lengths)
+        limits = tuple(np.asarray(limits, dtype=float).ravel().tolist())
+        return lengths, limits, resolution
+
+    def get(self, robot, limits=None, resolution=None):
+        if limits is None:
+            limits = DEFAULT_LIMITS
+        if resolution is None:
+            resolution = self.resolution
+        key = self.key((robot.L1, robot.L2, robot.L3), limits, resolution)
+
+        workspace = self.maps.get(key)
+        if workspace is not None:
+            self.hits += 1
+            self.maps.move_to_end(key)
+            return workspace
+
+        self.misses += 1
+        L1, L2, L3 = (n * self.length_step for n in key[0])
+        workspace = WorkspaceMap.build(RobotRRR(L1, L2, L3), limits, resolution)
+        self.maps[key] = workspace
+        if len(self.maps) > self.maxsize:
+            self.maps.popitem(last=False)
+            self.evictions += 1
+        return workspace
+
+    def clear(self):
+        self.maps.clear()